@@ -3,7 +3,10 @@
 # Date modified: 01/01/2021
 # Class: Ising model
 #################################
+import os
+import pickle
 import random
+from functools import partial
 import numpy as np
 from numpy.random import rand
 
@@ -16,9 +19,16 @@ class Ising:
         self.N = L*L # number of spins
         self.nwarmup = nwarmup # number of warm up step
         self.nsteps = nsteps # number of mc step
+        self.pbc = None # neighbor positions, built on demand
+        self.nbr = None # flat neighbor table, built on demand
+        self.subl = None # checkerboard neighbor tables, built on demand
 
-    def initialize(self):
-        """random initialization of spin on the 2D square lattice."""
+    def initialize(self, dtype=None):
+        """random initialization of spin on the 2D square lattice;
+        a numpy array of the given dtype is returned if dtype is set.
+        """
+        if dtype is not None:
+            return np.where(rand(self.L, self.L) < 0.5, -1, 1).astype(dtype)
         state = [[0]*self.L for _ in range(self.L)]
         for i in range(self.L):
             for j in range(self.L):
@@ -51,56 +61,377 @@ class Ising:
             res[de+8] = np.exp(-de/T)
         return res
 
+    def neighbor_table(self):
+        """
+        flat indices of the four nearest neighbours (down, up, right, left)
+        of every site with periodic boundary condition
+        """
+        if self.nbr is None:
+            np_, nm = map(np.asarray, self.neighbor_pos())
+            i, j = divmod(np.arange(self.N), self.L)
+            self.nbr = np.stack([np_[i]*self.L + j, nm[i]*self.L + j,
+                                 i*self.L + np_[j], i*self.L + nm[j]])
+        return self.nbr
+
+    def sublattices(self):
+        """
+        flat site indices of the two (red/black) checkerboard sublattices
+        and of their nearest neighbours with periodic boundary condition
+        """
+        if self.L % 2 != 0:
+            raise ValueError('checkerboard update requires an even lattice size')
+        if self.subl is None:
+            nbr = self.neighbor_table()
+            red = np.add.outer(np.arange(self.L), np.arange(self.L)) % 2 == 0
+            self.subl = []
+            for mask in (red, ~red):
+                idx = np.flatnonzero(mask)
+                self.subl.append((idx, nbr[:, idx]))
+        return self.subl
+
+    def cluster_labels(self, i, j):
+        """
+        union-find over the flat site indices: label every site with the
+        smallest index of the cluster connected by the bonds (i, j)
+        """
+        label = np.arange(self.N)
+        while i.size:
+            li, lj = label[i], label[j]
+            low = np.minimum(li, lj)
+            np.minimum.at(label, li, low) # hook roots onto the smaller root
+            np.minimum.at(label, lj, low)
+            while True: # pointer jumping until every site points to a root
+                root = label[label]
+                if np.array_equal(root, label):
+                    break
+                label = root
+            keep = label[i] != label[j] # bonds still joining two clusters
+            i, j = i[keep], j[keep]
+        return label
+
     def energy(self, spinconf):
         """total energy of a given spin configuration."""
-        ene = 0
-        np_, nm = self.neighbor_pos()
-        for i in range(self.L):
-            for j in range(self.L):
-                ene += -1*spinconf[i][j]*(spinconf[i][np_[j]] +\
-                     spinconf[i][nm[j]] +spinconf[np_[i]][j] + \
-                          spinconf[nm[i]][j] )
-        return ene/2 # to compensate for over-counting
-        
+        s = np.asarray(spinconf)
+        # count each bond once through its right and lower neighbour
+        return -int(np.sum(s*(np.roll(s, -1, axis=0) + np.roll(s, -1, axis=1))))
+
     def magnetization(self, spinconf):
         """total magnetization of a given spin configuration."""
-        mag = 0
-        for i in range(self.L):
-            for j in range(self.L):
-                mag += spinconf[i][j]
-        return mag
+        return int(np.sum(np.asarray(spinconf)))
         
-    def metropolis(self, spinconf, pw):
+    def metropolis(self, spinconf, pw, ene=None, mag=None):
         """metropolis algorithm."""
-        ene = self.energy(spinconf) # initial energy state
-        mag = self.magnetization(spinconf) # initial magnetization
-        np_, nm = self.neighbor_pos() # periodic boundary condition
+        if ene is None:
+            ene = self.energy(spinconf) # initial energy state
+        if mag is None:
+            mag = self.magnetization(spinconf) # initial magnetization
+        if self.pbc is None:
+            self.pbc = self.neighbor_pos() # periodic boundary condition
+        np_, nm = self.pbc
 
         for _ in range(self.N):
             ix = random.randint(0,self.L-1) # select random position
             iy = random.randint(0,self.L-1) # select random position
 
             # compute energy change
-            de = 2*spinconf[ix][iy]*(spinconf[ix][np_[iy]] + spinconf[ix][nm[iy]] +\
+            de = 2*int(spinconf[ix][iy])*int(spinconf[ix][np_[iy]] + spinconf[ix][nm[iy]] +\
                     spinconf[np_[ix]][iy] + spinconf[nm[ix]][iy] )
             if de <= 0 or rand() < pw[de + 8]:
                 spinconf[ix][iy] *= -1  # flip spin and retain the configuration
                 ene += de # update energy
-                mag += 2*spinconf[ix][iy] # update magnetization
+                mag += 2*int(spinconf[ix][iy]) # update magnetization
+        return ene, mag
+
+    def checkerboard(self, spinconf, pw, ene=None, mag=None):
+        """
+        checkerboard metropolis algorithm on an int8 numpy spin configuration;
+        spins of one sublattice do not interact with each other, so each
+        half-sweep is a single vectorized update; moves with zero energy
+        change are accepted with probability 1/2, since flipping all of them
+        at once can lock the lattice into a 2-cycle (e.g. width-1 stripes)
+        """
+        if ene is None:
+            ene = self.energy(spinconf) # initial energy state
+        if mag is None:
+            mag = self.magnetization(spinconf) # initial magnetization
+        pws = np.array(pw)[::2] # acceptance indexed by s*(sum of neighbors)+4
+        pws[4] = 0.5 # zero energy change
+        flat = spinconf.reshape(-1) # view on the lattice
+
+        for idx, nbr in self.sublattices():
+            s = flat[idx]
+            sn = s*np.take(flat, nbr).sum(axis=0, dtype=np.int8)
+            # one block of random numbers per half-sweep
+            accept = rand(idx.size) < np.take(pws, sn + 4)
+            flipped = np.where(accept, -s, s)
+            flat[idx] = flipped # flip accepted spins of the sublattice
+            ene += 2*int((sn*accept).sum()) # update energy
+            mag += int(flipped.sum()) - int(s.sum()) # update magnetization
+        return ene, mag
+
+    def wolff(self, spinconf, pw, ene=None, mag=None, ncluster=1):
+        """
+        wolff single-cluster algorithm on an int8 numpy spin configuration;
+        one call flips a fixed number ncluster of clusters, since stopping
+        on the number of flipped spins would bias the measured observables.
+        a single cluster is small far above Tc, so ncluster of the order of
+        N over the mean cluster size makes one call comparable to a sweep
+        """
+        if ene is None:
+            ene = self.energy(spinconf) # initial energy state
+        if mag is None:
+            mag = self.magnetization(spinconf) # initial magnetization
+        flat = spinconf.reshape(-1) # view on the lattice
+        nbr = self.neighbor_table()
+        padd = 1 - np.sqrt(pw[12]) # bond probability 1 - exp(-2/T)
+        incluster = np.zeros(self.N, dtype=bool)
+
+        for _ in range(ncluster):
+            seed = np.random.randint(self.N) # select random position
+            s0 = flat[seed]
+            incluster[seed] = True
+            stack = [np.array([seed])]
+            frontier = stack[0]
+            while frontier.size: # grow the cluster shell by shell
+                cand = nbr[:, frontier].ravel()
+                cand = cand[(flat[cand] == s0) & ~incluster[cand]]
+                cand = np.unique(cand[rand(cand.size) < padd])
+                incluster[cand] = True
+                stack.append(cand)
+                frontier = cand
+            cluster = np.concatenate(stack)
+
+            # energy change from the bonds crossing the cluster boundary
+            out = nbr[:, cluster].ravel()
+            out = out[~incluster[out]]
+            ene += 2*int(s0)*int(flat[out].sum(dtype=np.int64))
+            mag -= 2*int(s0)*cluster.size
+            flat[cluster] = -s0 # flip the cluster
+            incluster[cluster] = False
+        return ene, mag
+
+    def swendsen_wang(self, spinconf, pw, ene=None, mag=None):
+        """
+        swendsen-wang multi-cluster algorithm on an int8 numpy spin
+        configuration; every cluster is flipped with probability 1/2
+        """
+        flat = spinconf.reshape(-1) # view on the lattice
+        nbr = self.neighbor_table()
+        padd = 1 - np.sqrt(pw[12]) # bond probability 1 - exp(-2/T)
+
+        # bonds to the lower and right neighbours
+        i = np.tile(np.arange(self.N), 2)
+        j = np.concatenate([nbr[0], nbr[2]])
+        bond = (flat[i] == flat[j]) & (rand(i.size) < padd)
+        label = self.cluster_labels(i[bond], j[bond])
+        flip = rand(self.N) < 0.5 # flip decision per cluster label
+        flip = flip[label]
+        if ene is not None:
+            # energy change from the bonds between flipped and kept clusters
+            cut = flip[i] != flip[j]
+            ene += 2*int(np.sum(flat[i[cut]]*flat[j[cut]], dtype=np.int64))
+        if mag is not None:
+            mag -= 2*int(np.sum(flat[flip], dtype=np.int64))
+        flat[flip] *= -1
+        if ene is None:
+            ene = self.energy(spinconf)
+        if mag is None:
+            mag = self.magnetization(spinconf)
         return ene, mag
 
-    def mcsweeps(self, spinconf, pw):
-        """perform monte-carlo sweeps."""
+    def kernel(self, update, ncluster=1):
+        """
+        update kernel performing one monte-carlo sweep: 'metropolis'
+        (single spin), or on an int8 numpy lattice 'checkerboard',
+        'wolff' or 'swendsen_wang'; a 'wolff' sweep flips ncluster clusters
+        """
+        kernels = {'metropolis': self.metropolis,
+                   'checkerboard': self.checkerboard,
+                   'wolff': partial(self.wolff, ncluster=ncluster),
+                   'swendsen_wang': self.swendsen_wang}
+        if update not in kernels:
+            raise ValueError('unknown update kernel: {}'.format(update))
+        if ncluster < 1 or (ncluster != 1 and update != 'wolff'):
+            raise ValueError('ncluster must be a positive integer, and 1 '
+                             'unless update is wolff')
+        return kernels[update]
+
+    def mcsweeps(self, spinconf, pw, update='metropolis', hist=None,
+                 checkpoint=None, every=100, sk=None, ncluster=1):
+        """perform monte-carlo sweeps with the chosen update kernel, a
+        'wolff' sweep flipping ncluster clusters (see wolff); the joint
+        (energy, magnetization) histogram of the measured sweeps is counted
+        into the dictionary hist if one is given, the structure factor of
+        the measured sweeps is summed into the (L, L) array sk if one is
+        given, and the run is checkpointed to the directory checkpoint
+        every `every` sweeps if one is given (see resume).
+        """
+        if update != 'metropolis':
+            spinconf = np.asarray(spinconf, dtype=np.int8)
+        return self.run_sweeps(spinconf, pw, update, 0, np.zeros(6), hist,
+                               checkpoint, every, sk, ncluster)
+
+    def run_sweeps(self, spinconf, pw, update, start, avg, hist, checkpoint,
+                   every, sk=None, ncluster=1):
+        """perform the sweeps start, start+1, ... of a run."""
+        sweep = self.kernel(update, ncluster)
+        ene = self.energy(spinconf) # running totals, updated by every sweep
+        mag = self.magnetization(spinconf)
+        for k in range(start, self.nwarmup + self.nsteps):
+            ene, mag = sweep(spinconf, pw, ene, mag)
+            if k >= self.nwarmup:   # measure after warm up
+                self.accumulate(avg, ene, mag)
+                if hist is not None:
+                    hist[(ene, mag)] = hist.get((ene, mag), 0) + 1
+                if sk is not None:
+                    sk += self.structure_factor(spinconf)
+            if checkpoint is not None and (k + 1) % every == 0:
+                self.save_checkpoint(checkpoint, spinconf, pw, update,
+                                     k + 1, avg, hist, every, sk, ncluster)
+        return avg
+
+    def save_checkpoint(self, checkpoint, spinconf, pw, update, sweep, avg,
+                        hist, every, sk=None, ncluster=1):
+        """
+        write the lattice into one of two memory-mapped files and then,
+        atomically, the rest of the state naming that file; a run killed
+        while writing leaves the previous checkpoint intact
+        """
+        os.makedirs(checkpoint, exist_ok=True)
+        lattice = spinconf if isinstance(spinconf, np.ndarray) else \
+            np.asarray(spinconf, dtype=np.int8)
+        slot = (sweep//every) % 2
+        mm = np.memmap(os.path.join(checkpoint, 'lattice{}.dat'.format(slot)),
+                       dtype=lattice.dtype, mode='w+', shape=lattice.shape)
+        mm[:] = lattice
+        mm.flush()
+        del mm
+
+        state = {'L': self.L, 'nwarmup': self.nwarmup, 'nsteps': self.nsteps,
+                 'update': update, 'ncluster': ncluster, 'sweep': sweep,
+                 'avg': avg.copy(),
+                 'pw': list(pw), 'hist': None if hist is None else dict(hist),
+                 'sk': None if sk is None else sk.copy(),
+                 'every': every, 'slot': slot, 'list': lattice is not spinconf,
+                 'dtype': lattice.dtype.str, 'shape': lattice.shape,
+                 'np_random': np.random.get_state(),
+                 'random': random.getstate()}
+        path = os.path.join(checkpoint, 'state.pkl')
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+    def resume(self, checkpoint, hist=None, sk=None):
+        """
+        continue a checkpointed run of mcsweeps bit-for-bit from its last
+        checkpoint and return the averages of the whole run; the saved
+        histogram and structure factor are restored into hist and sk if
+        they are given
+        """
+        with open(os.path.join(checkpoint, 'state.pkl'), 'rb') as f:
+            state = pickle.load(f)
+        if (state['L'], state['nwarmup'], state['nsteps']) != \
+                (self.L, self.nwarmup, self.nsteps):
+            raise ValueError('checkpoint was written by a different model')
+
+        mm = np.memmap(os.path.join(checkpoint, 'lattice{}.dat'.format(state['slot'])),
+                       dtype=np.dtype(state['dtype']), mode='r',
+                       shape=tuple(state['shape']))
+        spinconf = mm.tolist() if state['list'] else np.array(mm)
+        del mm
+        if hist is not None and state['hist'] is not None:
+            hist.clear()
+            hist.update(state['hist'])
+        if sk is not None and state['sk'] is not None:
+            sk[:] = state['sk']
+        np.random.set_state(state['np_random'])
+        random.setstate(state['random'])
+        return self.run_sweeps(spinconf, state['pw'], state['update'],
+                               state['sweep'], state['avg'], hist,
+                               checkpoint, state['every'], sk,
+                               state.get('ncluster', 1))
+
+    def structure_factor(self, spinconf):
+        """static structure factor S(k) = |sum_x s_x exp(-ik.x)|^2/N of a
+        spin configuration, from a 2D FFT; k = 2*pi*(m, n)/L.
+        """
+        sq = np.fft.fft2(np.asarray(spinconf, dtype=float))
+        return (sq.real**2 + sq.imag**2)/self.N
+
+    def correlation(self, sk):
+        """spin-spin correlation function G(r) = (1/N) sum_x <s_x s_(x+r)>
+        from the averaged structure factor, by an inverse 2D FFT.
+        """
+        return np.fft.ifft2(sk).real
+
+    def correlation_length(self, sk):
+        """second-moment correlation length from the averaged structure
+        factor at k = 0 and at the smallest nonzero wave vector.
+        """
+        smin = (sk[1, 0] + sk[0, 1])/2 # average over the two lattice axes
+        return np.sqrt(max(sk[0, 0]/smin - 1, 0))/(2*np.sin(np.pi/self.L))
+
+    def accumulate(self, avg, ene, mag):
+        """add the observables of one sweep to the averages."""
+        avg[0] += ene
+        avg[1] += ene*ene
+        avg[2] += mag
+        avg[3] += mag*mag
+        avg[4] += np.sqrt(mag*mag)
+        avg[5] += mag*mag*mag*mag
+
+
+class IsingSimulation(Ising):
+    """stateful monte carlo simulation of 2D Ising model at temperature T;
+    the lattice, the neighbor tables and the running energy and
+    magnetization are kept across sweeps, and the running totals can be
+    checked against a full recompute every `check` sweeps; a 'wolff' sweep
+    flips ncluster clusters.
+    """
+
+    def __init__(self, L, nwarmup, nsteps, T, update='metropolis', check=0,
+                 ncluster=1):
+        """define default parameters and initialize the state."""
+        super().__init__(L, nwarmup, nsteps)
+        self.T = T # temperature
+        self.update = update # update kernel
+        self.check = check # sweeps between checks of the running totals
+        self.pw = self.precom_expo(T)
+        self.sweeper = self.kernel(update, ncluster)
+        self.spinconf = self.initialize(None if update == 'metropolis' else np.int8)
+        self.pbc = self.neighbor_pos()
+        self.neighbor_table()
+        self.ene = self.energy(self.spinconf) # running energy
+        self.mag = self.magnetization(self.spinconf) # running magnetization
+        self.nsweeps = 0 # number of sweeps performed
+
+    def sweep(self):
+        """perform one sweep and update the running totals."""
+        self.ene, self.mag = self.sweeper(self.spinconf, self.pw, self.ene, self.mag)
+        self.nsweeps += 1
+        if self.check and self.nsweeps % self.check == 0:
+            self.verify()
+        return self.ene, self.mag
+
+    def verify(self):
+        """compare the running totals with a full recompute."""
+        ene = self.energy(self.spinconf)
+        mag = self.magnetization(self.spinconf)
+        if ene != self.ene or mag != self.mag:
+            raise RuntimeError(
+                'running totals drifted after {} sweeps: energy {} != {}, '
+                'magnetization {} != {}'.format(
+                    self.nsweeps, self.ene, ene, self.mag, mag))
+
+    def run(self):
+        """perform monte-carlo sweeps from the current state."""
         avg = np.zeros(6) # initialize averages to zero
         for _ in range(self.nwarmup):   # equilibrate by warm up
-            self.metropolis(spinconf, pw)
+            self.sweep()
 
         for _ in range(self.nsteps):
-            ene, mag = self.metropolis(spinconf, pw)
-            avg[0] += ene 
-            avg[1] += ene*ene
-            avg[2] += mag
-            avg[3] += mag*mag
-            avg[4] += np.sqrt(mag*mag)
-            avg[5] += mag*mag*mag*mag
-        return avg
\ No newline at end of file
+            ene, mag = self.sweep()
+            self.accumulate(avg, ene, mag)
+        return avg
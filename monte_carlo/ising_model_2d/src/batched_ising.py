@@ -0,0 +1,108 @@
+#################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Class: Batched Ising model
+#################################
+import numpy as np
+from numpy.random import rand
+from Ising_model_2d import Ising
+
+
+class BatchedIsing(Ising):
+    """monte carlo simulation of R independent replicas of 2D Ising model
+    held in one (R, L, L) int8 array; every replica has its own temperature
+    and acceptance table, and all replicas are updated by one vectorized
+    checkerboard sweep.
+
+    inputs:
+        (integer) L: lattice size
+        (integer) nwarmup: number of warm up sweeps
+        (integer) nsteps: number of measured sweeps
+        (integer) R: number of replicas
+
+    outputs:
+        (2d array) avg: accumulated observables of every replica, one row
+        per replica in the layout returned by Ising.mcsweeps
+    """
+
+    def __init__(self, L, nwarmup, nsteps, R):
+        """define default parameters."""
+        super().__init__(L, nwarmup, nsteps)
+        self.R = R # number of replicas
+
+    def initialize(self, dtype=np.int8):
+        """random initialization of the spins of all replicas."""
+        return np.where(rand(self.R, self.L, self.L) < 0.5, -1, 1).astype(dtype)
+
+    def precom_expo(self, T):
+        """precompute energy change when spin is flipped, one row per
+        replica temperature.
+        """
+        T = np.broadcast_to(np.asarray(T, dtype=float), (self.R,))
+        res = np.zeros((self.R, 17))
+        for de in range(-8, 9, 4):
+            res[:, de + 8] = np.exp(-de/T)
+        return res
+
+    def energy(self, spinconf):
+        """total energy of every replica."""
+        s = np.asarray(spinconf)
+        bonds = s*(np.roll(s, -1, axis=1) + np.roll(s, -1, axis=2))
+        return -bonds.sum(axis=(1, 2), dtype=np.int64)
+
+    def magnetization(self, spinconf):
+        """total magnetization of every replica."""
+        return np.asarray(spinconf).sum(axis=(1, 2), dtype=np.int64)
+
+    def checkerboard(self, spinconf, pw, ene=None, mag=None):
+        """checkerboard metropolis algorithm on all replicas at once; moves
+        with zero energy change are accepted with probability 1/2.
+        """
+        if ene is None:
+            ene = self.energy(spinconf) # initial energy state
+        if mag is None:
+            mag = self.magnetization(spinconf) # initial magnetization
+        pws = np.array(pw)[:, ::2] # acceptance indexed by s*(sum of neighbors)+4
+        pws[:, 4] = 0.5 # zero energy change, see Ising.checkerboard
+        flat = spinconf.reshape(self.R, -1) # view on the lattices
+
+        for idx, nbr in self.sublattices():
+            s = flat[:, idx]
+            sn = s*flat[:, nbr].sum(axis=1, dtype=np.int8)
+            # one block of random numbers per half-sweep for all replicas
+            accept = rand(self.R, idx.size) < np.take_along_axis(pws, sn + 4, axis=1)
+            flipped = np.where(accept, -s, s)
+            flat[:, idx] = flipped # flip accepted spins of the sublattice
+            ene = ene + 2*(sn*accept).sum(axis=1, dtype=np.int64) # update energy
+            mag = mag + flipped.sum(axis=1, dtype=np.int64) -\
+                s.sum(axis=1, dtype=np.int64) # update magnetization
+        return ene, mag
+
+    def kernel(self, update, ncluster=1):
+        """only the checkerboard kernel is vectorized over replicas; ncluster
+        must be 1 as there are no wolff sweeps."""
+        if update != 'checkerboard':
+            raise ValueError('batched replicas only support checkerboard updates')
+        if ncluster != 1:
+            raise ValueError('ncluster is only used by wolff updates')
+        return self.checkerboard
+
+    def mcsweeps(self, spinconf, pw, update='checkerboard', checkpoint=None,
+                 every=100):
+        """perform monte-carlo sweeps on all replicas; returns one row of
+        averages per replica.
+        """
+        spinconf = np.asarray(spinconf, dtype=np.int8)
+        return self.run_sweeps(spinconf, pw, update, 0, np.zeros((self.R, 6)),
+                               None, checkpoint, every)
+
+    def accumulate(self, avg, ene, mag):
+        """add the observables of one sweep to the averages of every replica."""
+        ene = ene.astype(float)
+        mag = mag.astype(float)
+        avg[:, 0] += ene
+        avg[:, 1] += ene*ene
+        avg[:, 2] += mag
+        avg[:, 3] += mag*mag
+        avg[:, 4] += np.abs(mag)
+        avg[:, 5] += mag*mag*mag*mag
@@ -0,0 +1,133 @@
+#################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Class: Bit-packed Ising model
+#################################
+import numpy as np
+from numpy.random import rand
+from Ising_model_2d import Ising
+
+ONE = np.uint64(1)
+SHIFT = np.uint64(63)
+EVEN = np.uint64(0x5555555555555555) # bits of the even columns in a word
+ODD = np.uint64(0xAAAAAAAAAAAAAAAA) # bits of the odd columns in a word
+BITS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words):
+    """total number of set bits in an array of uint64 words."""
+    if hasattr(np, 'bitwise_count'): # numpy >= 2.0
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+    return int(BITS[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+class BitPackedIsing(Ising):
+    """monte carlo simulation of 2D Ising model on a multi-spin coded
+    lattice: 64 spins are packed in every uint64 word of an (L, L/64)
+    array, bit k of word w in row i being the spin in column 64*w + k
+    (1 = spin up, 0 = spin down).
+
+    inputs:
+        (integer) L: lattice size, a multiple of 64
+        (integer) nwarmup: number of warm up sweeps
+        (integer) nsteps: number of measured sweeps
+        (integer) nrows: number of rows drawing random numbers at once
+    """
+
+    def __init__(self, L, nwarmup, nsteps, nrows=64):
+        """define default parameters."""
+        if L % 64 != 0:
+            raise ValueError('bit-packed lattice size must be a multiple of 64')
+        super().__init__(L, nwarmup, nsteps)
+        self.nword = L//64 # number of words per row
+        self.nrows = nrows
+
+    def initialize(self, dtype=None):
+        """random initialization of the packed spins; 8 bytes per 64 spins."""
+        words = np.frombuffer(np.random.bytes(8*self.L*self.nword), dtype=np.uint64)
+        return words.reshape(self.L, self.nword).copy()
+
+    def pack(self, spinconf):
+        """pack a spin configuration of +1/-1 into uint64 words."""
+        bits = np.packbits(np.asarray(spinconf) > 0, axis=1, bitorder='little')
+        return bits.view('<u8').astype(np.uint64)
+
+    def unpack(self, words):
+        """unpack uint64 words into an int8 spin configuration of +1/-1."""
+        bits = np.unpackbits(words.astype('<u8').view(np.uint8), axis=1,
+                             bitorder='little')
+        return (2*bits.astype(np.int8) - 1).reshape(self.L, self.L)
+
+    def right(self, words):
+        """spins of the right neighbours with periodic boundary condition."""
+        return (words >> ONE) | (np.roll(words, -1, axis=1) << SHIFT)
+
+    def left(self, words):
+        """spins of the left neighbours with periodic boundary condition."""
+        return (words << ONE) | (np.roll(words, 1, axis=1) >> SHIFT)
+
+    def energy(self, words):
+        """total energy from the number of anti-aligned bonds."""
+        anti = popcount(words ^ self.right(words)) +\
+            popcount(words ^ np.roll(words, -1, axis=0))
+        return 2*anti - 2*self.N
+
+    def magnetization(self, words):
+        """total magnetization from the number of up spins."""
+        return 2*popcount(words) - self.N
+
+    def metropolis(self, words, pw, ene=None, mag=None):
+        """
+        multi-spin coded checkerboard metropolis algorithm: the number of
+        anti-aligned neighbours of 64 spins is counted at once with bitwise
+        adders; spins with 3 or 4 anti-aligned neighbours are flipped, with
+        2 (zero energy change) with probability 1/2 (see Ising.checkerboard),
+        and with 0 or 1 with probability pw[16] = exp(-8/T) or pw[12] =
+        exp(-4/T); the totals are recounted with popcount, so ene and mag
+        are not needed
+        """
+        rows = np.arange(self.L) % 2
+        for color in (0, 1):
+            # bits of the sublattice (i+j) % 2 == color in each row
+            mask = np.where((rows + color) % 2 == 0, EVEN, ODD)[:, None]
+
+            # anti-aligned neighbours, one bit per spin
+            x1 = words ^ self.right(words)
+            x2 = words ^ self.left(words)
+            x3 = words ^ np.roll(words, -1, axis=0)
+            x4 = words ^ np.roll(words, 1, axis=0)
+
+            # bit-sliced sum a = x1 + x2 + x3 + x4 in (low, mid, high) bits
+            s1, c1 = x1 ^ x2, x1 & x2
+            s2, c2 = x3 ^ x4, x3 & x4
+            low = s1 ^ s2
+            mid = (c1 ^ c2) | (s1 & s2)
+            high = c1 & c2
+            ge3 = high | (mid & low) # a >= 3: energy decreases
+            eq2 = mid & ~low # a == 2: de = 0
+            eq1 = low & ~(mid | high) # a == 1: de = 4
+            eq0 = ~(low | mid | high) # a == 0: de = 8
+
+            for i in range(0, self.L, self.nrows):
+                block = slice(i, i + self.nrows)
+                u = rand(len(rows[block]), self.L)
+                r1 = self.pack(u < pw[12])
+                r0 = self.pack(u < pw[16])
+                rh = self.pack(u < 0.5)
+                accept = ge3[block] | (eq2[block] & rh) |\
+                    (eq1[block] & r1) | (eq0[block] & r0)
+                words[block] ^= accept & mask[block] # flip accepted spins
+        return self.energy(words), self.magnetization(words)
+
+    def structure_factor(self, words):
+        """static structure factor of the unpacked spin configuration."""
+        return super().structure_factor(self.unpack(words))
+
+    def kernel(self, update, ncluster=1):
+        """only the multi-spin coded metropolis kernel acts on packed words;
+        ncluster must be 1 as there are no wolff sweeps."""
+        if update != 'metropolis':
+            raise ValueError('bit-packed lattice only supports metropolis updates')
+        if ncluster != 1:
+            raise ValueError('ncluster is only used by wolff updates')
+        return self.metropolis
@@ -0,0 +1,180 @@
+#################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Class: Streaming observables
+#################################
+import numpy as np
+
+
+class BinningAnalysis:
+    """streaming binning (blocking) analysis of a vector time series.
+
+    level k holds the means of consecutive bins of 2**k samples, so the
+    memory is O(1) per level and O(log n) in total for n samples.
+
+    inputs:
+        (integer) nobs: number of observables in each sample
+        (integer) minbins: fewest bins a level needs to give an error estimate
+
+    outputs:
+        (1d array) mean: sample mean of each observable
+        (2d array) cov: covariance matrix of the mean at a given level
+        (1d array) error: standard error of the mean at a given level
+        (1d array) tau: integrated autocorrelation time of each observable
+    """
+
+    def __init__(self, nobs, minbins=32):
+        """define parameters of the accumulator."""
+        self.nobs = nobs
+        self.minbins = minbins
+        self.count = 0 # number of samples
+        self.pending = [] # first half of the bin being filled at each level
+        self.n = [] # number of complete bins at each level
+        self.sum = [] # sum of the bin means at each level
+        self.sum2 = [] # sum of the outer products of the bin means
+
+    def push(self, x):
+        """add one sample and propagate completed bins up the levels."""
+        x = np.asarray(x, dtype=float)
+        self.count += 1
+        level = 0
+        while True:
+            if level == len(self.n):
+                self.pending.append(None)
+                self.n.append(0)
+                self.sum.append(np.zeros(self.nobs))
+                self.sum2.append(np.zeros((self.nobs, self.nobs)))
+            self.n[level] += 1
+            self.sum[level] += x
+            self.sum2[level] += np.outer(x, x)
+            if self.pending[level] is None:
+                self.pending[level] = x
+                break
+            x = (self.pending[level] + x)/2 # mean of the completed bin
+            self.pending[level] = None
+            level += 1
+
+    def mean(self):
+        """sample mean of each observable."""
+        return self.sum[0]/self.n[0]
+
+    def level(self):
+        """largest level with at least minbins bins."""
+        k = 0
+        while k + 1 < len(self.n) and self.n[k + 1] >= self.minbins:
+            k += 1
+        return k
+
+    def cov(self, level=None):
+        """covariance matrix of the mean estimated from the bins of a level."""
+        k = self.level() if level is None else level
+        n = self.n[k]
+        if n < 2:
+            return np.full((self.nobs, self.nobs), np.inf)
+        mean = self.sum[k]/n
+        return (self.sum2[k]/n - np.outer(mean, mean))/(n - 1)
+
+    def error(self, level=None):
+        """standard error of the mean estimated from the bins of a level."""
+        return np.sqrt(np.maximum(np.diag(self.cov(level)), 0))
+
+    def tau(self, level=None):
+        """integrated autocorrelation time from the growth of the binned
+        variance of the mean over the unbinned one.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return 0.5*np.diag(self.cov(level))/np.diag(self.cov(0))
+
+
+class IsingObservables(BinningAnalysis):
+    """streaming measurement of 2D Ising model observables with error bars.
+
+    every sweep pushes (E, E^2, |M|, M^2); specific heat and susceptibility
+    and their errors follow from the binned covariance by error propagation.
+
+    inputs:
+        (object) model: Ising model providing N, nwarmup, nsteps and kernels
+        (float) T: temperature
+        (integer) minbins: fewest bins a level needs to give an error estimate
+        (float) ctau: fewest autocorrelation times a bin must span before
+        its error estimate is trusted for stopping
+    """
+
+    def __init__(self, model, T, minbins=32, ctau=10):
+        """define parameters of the measurement."""
+        super().__init__(4, minbins)
+        self.model = model
+        self.T = T
+        self.ctau = ctau
+
+    def push(self, ene, mag):
+        """add the energy and magnetization of one sweep."""
+        super().push([ene, ene*ene, abs(mag), mag*mag])
+
+    def energy(self):
+        """energy per spin and its error."""
+        return self.mean()[0]/self.model.N, self.error()[0]/self.model.N
+
+    def magnetization(self):
+        """absolute magnetization per spin and its error."""
+        return self.mean()[2]/self.model.N, self.error()[2]/self.model.N
+
+    def fluctuation(self, i, norm):
+        """(<x^2> - <x>^2)/norm for x = observable i and its propagated error."""
+        mean = self.mean()
+        grad = np.zeros(self.nobs)
+        grad[i] = -2*mean[i]
+        grad[i + 1] = 1
+        value = (mean[i + 1] - mean[i]*mean[i])/norm
+        error = np.sqrt(max(grad @ self.cov() @ grad, 0))/norm
+        return value, error
+
+    def specific_heat(self):
+        """specific heat per spin and its error."""
+        return self.fluctuation(0, self.model.N*self.T**2)
+
+    def susceptibility(self):
+        """magnetic susceptibility per spin and its error."""
+        return self.fluctuation(2, self.model.N*self.T)
+
+    def converged(self, rel_err):
+        """
+        whether specific heat and susceptibility reached the relative error;
+        the bins of the level used must hold at least minbins bins of at
+        least ctau autocorrelation times each, otherwise short bins of a
+        correlated series underestimate the error
+        """
+        k = self.level()
+        if self.n[k] < self.minbins:
+            return False
+        tau = np.nan_to_num(self.tau(k)) # 0 for constant observables
+        if 2**k < self.ctau*np.max(tau):
+            return False
+        for value, error in (self.specific_heat(), self.susceptibility()):
+            if not error <= rel_err*abs(value):
+                return False
+        return True
+
+    def measure(self, spinconf, pw, update='metropolis', rel_err=None, check=100,
+                ncluster=1):
+        """
+        warm up, then record every sweep for up to model.nsteps sweeps; with
+        rel_err set the run stops as soon as the relative errors of specific
+        heat and susceptibility are below rel_err (checked every check sweeps);
+        a 'wolff' sweep flips ncluster clusters
+        """
+        sweep = self.model.kernel(update, ncluster)
+        if update != 'metropolis':
+            spinconf = np.asarray(spinconf, dtype=np.int8)
+
+        ene = self.model.energy(spinconf) # running totals
+        mag = self.model.magnetization(spinconf)
+        for _ in range(self.model.nwarmup):   # equilibrate by warm up
+            ene, mag = sweep(spinconf, pw, ene, mag)
+
+        for step in range(1, self.model.nsteps + 1):
+            ene, mag = sweep(spinconf, pw, ene, mag)
+            self.push(ene, mag)
+            if rel_err is not None and step % check == 0 and self.converged(rel_err):
+                break
+        return self
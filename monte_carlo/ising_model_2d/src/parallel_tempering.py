@@ -0,0 +1,136 @@
+#################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Class: Parallel tempering
+#################################
+import random
+from functools import partial
+from multiprocessing import Pool
+import numpy as np
+from numpy.random import rand
+from Ising_model_2d import Ising
+
+
+def run_sweeps(args):
+    """perform sweeps on one replica and record energy and magnetization
+    after every sweep; runs in a worker process.
+    """
+    L, spinconf, pw, nsweeps, update, ncluster, seed = args
+    np.random.seed(seed) # independent random stream per task
+    random.seed(int(seed))
+    sweep = Ising(L, 0, nsweeps).kernel(update, ncluster)
+    ene = np.zeros(nsweeps)
+    mag = np.zeros(nsweeps)
+    for k in range(nsweeps):
+        ene[k], mag[k] = sweep(spinconf, pw)
+    return spinconf, ene, mag
+
+
+def run_sweeps_serial(args):
+    """run_sweeps in the calling process, restoring the caller's global
+    random states afterwards so that only pool workers are reseeded.
+    """
+    np_state = np.random.get_state()
+    py_state = random.getstate()
+    try:
+        return run_sweeps(args)
+    finally:
+        np.random.set_state(np_state)
+        random.setstate(py_state)
+
+
+class ParallelTempering:
+    """replica-exchange monte carlo simulation of 2D Ising model.
+
+    inputs:
+        (integer) L: lattice size
+        (integer) nwarmup: number of warm up sweeps
+        (integer) nsteps: number of measured sweeps
+        (1d array) T: increasing temperatures, one replica per temperature
+        (integer) nswap: number of sweeps between swap attempts
+        (integer) nprocs: number of worker processes (None for all cores)
+
+    outputs:
+        (2d array) avg: accumulated observables per temperature, in the
+        layout returned by Ising.mcsweeps
+        (1d array) acc: swap acceptance rate between temperatures T[i], T[i+1]
+    """
+
+    def __init__(self, L, nwarmup, nsteps, T, nswap=1, nprocs=None):
+        """define parameters of the model."""
+        self.L = L
+        self.nwarmup = nwarmup
+        self.nsteps = nsteps
+        self.T = np.asarray(T, dtype=float)
+        self.nswap = nswap
+        self.nprocs = nprocs
+        self.model = Ising(L, nwarmup, nsteps)
+
+    def swap(self, ene, temp, shift):
+        """attempt swaps of the temperature labels of replicas at neighboring
+        temperatures T[i], T[i+1] for i = shift, shift+2, ...
+        """
+        beta = 1/self.T
+        replica = np.argsort(temp) # replica at each temperature
+        accepted = np.zeros(len(self.T) - 1)
+        for i in range(shift, len(self.T) - 1, 2):
+            r1, r2 = replica[i], replica[i + 1]
+            delta = (beta[i] - beta[i + 1])*(ene[r1] - ene[r2])
+            if delta >= 0 or rand() < np.exp(delta):
+                temp[r1], temp[r2] = i + 1, i # exchange labels, not lattices
+                accepted[i] = 1
+        return accepted
+
+    def run(self, update='metropolis', ncluster=1):
+        """run all replicas with the chosen Ising update kernel, a 'wolff'
+        sweep flipping ncluster clusters."""
+        ntemp = len(self.T)
+        pws = [self.model.precom_expo(t) for t in self.T]
+        dtype = None if update == 'metropolis' else np.int8
+        spinconfs = [self.model.initialize(dtype) for _ in range(ntemp)]
+        temp = np.arange(ntemp) # temperature label of each replica
+
+        avg = np.zeros((ntemp, 6)) # initialize averages to zero
+        accepted = np.zeros(ntemp - 1)
+        attempted = np.zeros(ntemp - 1)
+        ene = np.zeros(ntemp) # energy of each replica after the last sweep
+
+        pool = Pool(self.nprocs) if self.nprocs != 1 else None
+        if pool is not None:
+            mapper = partial(pool.map, run_sweeps)
+        else:
+            mapper = partial(map, run_sweeps_serial)
+        try:
+            done = 0
+            nround = 0
+            while done < self.nwarmup + self.nsteps:
+                nsweeps = min(self.nswap, self.nwarmup + self.nsteps - done)
+                seeds = np.random.randint(2**31, size=ntemp)
+                tasks = [(self.L, spinconfs[r], pws[temp[r]], nsweeps,
+                          update, ncluster, seeds[r]) for r in range(ntemp)]
+                results = list(mapper(tasks))
+
+                # accumulate the measured sweeps at each replica's temperature
+                skip = max(0, self.nwarmup - done)
+                for r, (spinconf, e, m) in enumerate(results):
+                    spinconfs[r] = spinconf
+                    ene[r] = e[-1]
+                    e, m = e[skip:], m[skip:]
+                    avg[temp[r]] += [e.sum(), (e*e).sum(), m.sum(),
+                                     (m*m).sum(), np.abs(m).sum(),
+                                     (m*m*m*m).sum()]
+                done += nsweeps
+
+                # alternate between even and odd temperature pairs
+                shift = nround % 2
+                attempted[shift::2] += 1
+                accepted += self.swap(ene, temp, shift)
+                nround += 1
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        with np.errstate(invalid='ignore'):
+            acc = accepted/attempted
+        return avg, acc
@@ -0,0 +1,101 @@
+#################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Class: Histogram reweighting
+#################################
+import numpy as np
+
+
+def logsumexp(a, axis=None):
+    """log(sum(exp(a))) along an axis without overflow."""
+    amax = np.max(a, axis=axis, keepdims=True)
+    amax = np.where(np.isfinite(amax), amax, 0)
+    res = np.log(np.sum(np.exp(a - amax), axis=axis, keepdims=True)) + amax
+    return np.squeeze(res, axis=axis) if axis is not None else res.item()
+
+
+class HistogramReweighting:
+    """single- and multi-histogram (ferrenberg-swendsen) reweighting of
+    the joint (energy, magnetization) histograms of 2D Ising model runs.
+
+    inputs:
+        (integer) N: number of spins
+        (1d array) T: temperatures of the runs
+        (list) hists: histogram {(E, M): count} of each run, as counted
+        by Ising.mcsweeps(..., hist=hist)
+        (float) tol: convergence tolerance of the free energies
+        (integer) maxiter: maximum number of self-consistent iterations
+
+    outputs:
+        (1d array) logg: log density of states of the sampled (E, M) bins
+        (1d array) f: dimensionless free energies of the runs
+        (tuple) e, c, m, chi: energy, specific heat, absolute magnetization
+        and susceptibility per spin at the requested temperatures
+        (1d array) quality: effective fraction of samples at each temperature
+    """
+
+    def __init__(self, N, T, hists, tol=1e-10, maxiter=10000):
+        """define parameters and solve for the density of states."""
+        self.N = N
+        self.T = np.atleast_1d(np.asarray(T, dtype=float))
+        self.tol = tol
+        self.maxiter = maxiter
+
+        keys = sorted(set().union(*hists)) # sampled (E, M) bins
+        self.ene = np.array([k[0] for k in keys], dtype=float)
+        self.mag = np.array([k[1] for k in keys], dtype=float)
+        self.counts = np.array([[h.get(k, 0) for k in keys] for h in hists],
+                               dtype=float)
+        self.nsamples = self.counts.sum(axis=1)
+        self.logg, self.f = self.solve()
+
+    def solve(self):
+        """self-consistent ferrenberg-swendsen equations in log space."""
+        beta = 1/self.T
+        logh = np.log(self.counts.sum(axis=0))
+        logn = np.log(self.nsamples)
+        f = np.zeros(len(self.T))
+        for _ in range(self.maxiter):
+            # log g(E, M) = log sum_r H_r - log sum_r n_r exp(f_r - beta_r E)
+            logg = logh - logsumexp(logn[:, None] + f[:, None] -
+                                    np.outer(beta, self.ene), axis=0)
+            fnew = -logsumexp(logg[None, :] - np.outer(beta, self.ene), axis=1)
+            fnew -= fnew[0] # fix the arbitrary constant
+            if np.max(np.abs(fnew - f)) < self.tol:
+                f = fnew
+                break
+            f = fnew
+        return logg, f
+
+    def probabilities(self, T):
+        """reweighted probability of every sampled bin at each temperature."""
+        beta = 1/np.atleast_1d(np.asarray(T, dtype=float))
+        logw = self.logg[None, :] - np.outer(beta, self.ene)
+        return np.exp(logw - logsumexp(logw, axis=1)[:, None])
+
+    def observables(self, T):
+        """energy, specific heat, absolute magnetization and susceptibility
+        per spin at the temperatures T.
+        """
+        T = np.atleast_1d(np.asarray(T, dtype=float))
+        prob = self.probabilities(T)
+        e1 = prob @ self.ene
+        e2 = prob @ (self.ene*self.ene)
+        m1 = prob @ np.abs(self.mag)
+        m2 = prob @ (self.mag*self.mag)
+        e = e1/self.N
+        c = (e2 - e1*e1)/(self.N*T*T)
+        m = m1/self.N
+        chi = (m2 - m1*m1)/(self.N*T)
+        return e, c, m, chi
+
+    def quality(self, T):
+        """
+        histogram overlap at each temperature: the kish effective number of
+        reweighted samples as a fraction of all samples; values near zero
+        mean T lies outside the range covered by the runs
+        """
+        prob = self.probabilities(T)
+        total = self.counts.sum(axis=0)
+        neff = 1/np.sum(prob*prob/total[None, :], axis=1)
+        return neff/self.nsamples.sum()
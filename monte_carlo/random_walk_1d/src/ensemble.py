@@ -0,0 +1,133 @@
+####################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Class: Ensemble statistics of walks
+####################################
+import numpy as np
+
+
+class Moments:
+    """streaming per-step central moments of an ensemble of walks
+    (welford updates with the exact pairwise merge of chan and pebay).
+
+    inputs:
+        (integer) size: number of steps + 1 tracked per trajectory
+        (integer) order: highest central moment kept, 2, 3 or 4
+
+    outputs:
+        (1d array) mean: mean position at each step
+        (1d array) variance: position variance at each step
+        (1d array) central: central moment of order k at each step
+    """
+
+    def __init__(self, size, order=2):
+        """define empty accumulators."""
+        if order not in (2, 3, 4):
+            raise ValueError('order must be 2, 3 or 4')
+        self.order = order
+        self.n = 0   # number of trajectories
+        self.mean = np.zeros(size)
+        self.m = [None, None] + [np.zeros(size) for _ in range(order - 1)]
+
+    def push(self, chunk):
+        """
+        add a (trials, size) chunk of trajectories; the float deviations
+        are formed for blocks of columns so that they take at most half the
+        memory of the chunk itself, the rest of a budget of twice the chunk
+        being left for the accumulators
+        """
+        chunk = np.asarray(chunk)
+        rows, size = chunk.shape
+        other = Moments(size, self.order)
+        other.n = rows
+        width = max(1, chunk.nbytes // (32*max(rows, 1)))   # columns per block
+        for lo in range(0, size, width):
+            cols = slice(lo, lo + width)
+            dev = chunk[:, cols].astype(float)
+            other.mean[cols] = dev.mean(axis=0)
+            dev -= other.mean[cols]
+            power = dev * dev
+            other.m[2][cols] = power.sum(axis=0)
+            for k in range(3, self.order + 1):
+                power *= dev
+                other.m[k][cols] = power.sum(axis=0)
+            del dev, power   # free the block before the next one
+        self.merge(other)
+
+    def merge(self, other):
+        """merge the accumulators of another ensemble, e.g. a worker."""
+        na, nb = self.n, other.n
+        if nb == 0:
+            return self
+        if na == 0:
+            self.n, self.mean = nb, other.mean.copy()
+            self.m = [None, None] + [m.copy() for m in other.m[2:]]
+            return self
+        n = na + nb
+        delta = other.mean - self.mean
+        ma, mb = self.m, other.m
+        m = [None, None, ma[2] + mb[2] + delta**2*na*nb/n]
+        if self.order >= 3:
+            m.append(ma[3] + mb[3] + delta**3*na*nb*(na - nb)/n**2 +
+                     3*delta*(na*mb[2] - nb*ma[2])/n)
+        if self.order >= 4:
+            m.append(ma[4] + mb[4] +
+                     delta**4*na*nb*(na*na - na*nb + nb*nb)/n**3 +
+                     6*delta**2*(na*na*mb[2] + nb*nb*ma[2])/n**2 +
+                     4*delta*(na*mb[3] - nb*ma[3])/n)
+        self.n = n
+        self.mean = self.mean + delta*nb/n
+        self.m = m
+        return self
+
+    def central(self, k):
+        """central moment of order k at each step."""
+        return self.m[k]/self.n
+
+    def variance(self):
+        """position variance at each step."""
+        return self.central(2)
+
+
+def ensemble(chunks, ntrials, nsteps, stream=False):
+    """
+    collect chunks of (trials, nsteps + 1) trajectories into x_arr, the
+    histogram of final positions and the per-step mean and variance;
+    with stream=True x_arr is not stored and is returned as None
+    """
+    x_arr = None if stream else np.zeros((ntrials, nsteps + 1))
+    moments = Moments(nsteps + 1)
+    visited_sites = {}   # map visited sites to count after n steps
+    start = 0
+    for pos in chunks:
+        if x_arr is not None:
+            x_arr[start:start + len(pos)] = pos
+        moments.push(pos)
+        x, counts = np.unique(pos[:, -1], return_counts=True)
+        for key, val in zip(x.tolist(), counts.tolist()):
+            visited_sites[key] = visited_sites.get(key, 0) + val
+        start += len(pos)
+        del pos   # free the chunk before the next one is drawn
+    return x_arr, visited_sites, moments.mean, moments.variance()
+
+
+def sites_count(pos):
+    """
+    number of distinct sites visited by every trajectory of a (trials,
+    nsteps + 1) chunk after each step; a nearest-neighbour walk in 1D has
+    visited exactly the sites between its running minimum and maximum
+    """
+    pos = np.asarray(pos)
+    return (np.maximum.accumulate(pos, axis=1) -
+            np.minimum.accumulate(pos, axis=1) + 1)
+
+
+def mean_sites_count(chunks, ntrials, nsteps):
+    """mean number of distinct sites visited after each step over all
+    trajectories of the chunks.
+    """
+    total = np.zeros(nsteps + 1)
+    for pos in chunks:
+        total += sites_count(pos).sum(axis=0)
+        del pos
+    return total / ntrials
@@ -5,6 +5,7 @@
 ####################################
 import numpy as np
 from numpy.random import rand
+from ensemble import ensemble, mean_sites_count
 
 
 class PersistentRandomWalk1D:
@@ -31,45 +32,65 @@ class PersistentRandomWalk1D:
         self.ntrials = ntrials
         self.p = p
 
-    def monte_carlo(self):
-        """monte carlo simulation."""
-        x_arr = np.zeros((self.ntrials, self.nsteps + 1))
-        x2_arr = np.zeros((self.ntrials, self.nsteps + 1))
-        visited_sites = {}  # track visited sites and their count
-        for i in range(self.ntrials):
-            dir = np.zeros(self.nsteps + 1)   # direction of the last step
-            x = 0   # initial position
-            dir[0] = 1   # initial (previous) direction
-            for j in range(self.nsteps):
-                # step in the same direction as the previous step
-                if rand() <= self.p:
-                    if dir[j] == 1:
-                        x += 1   # step right
-                        dir[j + 1] = 1   # update direction of step
-                    else:
-                        x -= 1   # step left
-                        dir[j + 1] = -1   # update direction of step
-
-                else:  # step in the opposite direction to the prevoius step
-                    if dir[j] == 1:
-                        x -= 1
-                        dir[j + 1] = -1
-                    else:
-                        x += 1
-                        dir[j + 1] = 1
+    def trajectories(self, max_bytes=2**28, method='vectorized'):
+        """
+        generate the positions of all trials in chunks of trials that stay
+        below max_bytes; method 'vectorized' draws a block of +1/-1 keep/flip
+        variables per chunk, the directions being their cumulative product
+        and the positions the cumulative sum of the directions, and 'loop'
+        steps every trial in python
+        """
+        if method not in ('vectorized', 'loop'):
+            raise ValueError("method must be 'vectorized' or 'loop'")
+        rows = max(1, int(max_bytes // (16*(self.nsteps + 1))))
+        for start in range(0, self.ntrials, rows):
+            n = min(rows, self.ntrials - start)
+            if method == 'vectorized':
+                # keep the direction with probability p, otherwise flip it
+                flips = 2*(rand(n, self.nsteps) <= self.p).view(np.int8) - 1
+                dirs = np.cumprod(flips, axis=1, dtype=np.int8)   # initial direction 1
+                pos = np.zeros((n, self.nsteps + 1), dtype=np.int32)
+                np.cumsum(dirs, axis=1, dtype=np.int32, out=pos[:, 1:])
+                yield pos
+                del pos   # free the chunk before drawing the next one
+                continue
 
-                # update the position array at each n steps
-                x_arr[i][j + 1] = x
-                x2_arr[i][j + 1] = x * x
+            pos = np.zeros((n, self.nsteps + 1), dtype=np.int64)
+            for i in range(n):
+                x = 0   # initial position
+                d = 1   # initial (previous) direction
+                for j in range(self.nsteps):
+                    # step in the same direction as the previous step with
+                    # probability p, otherwise in the opposite direction
+                    if rand() > self.p:
+                        d = -d
+                    x += d
+                    pos[i, j + 1] = x
+            yield pos
+            del pos   # free the chunk before drawing the next one
 
-            # update visited sites after n steps
-            visited_sites[x] = visited_sites.get(x, 0) + 1
+    def monte_carlo(self, max_bytes=2**28, stream=False, method='vectorized'):
+        """monte carlo simulation; with stream=True only per-step moments
+        are kept and x_arr is returned as None.
+        """
+        return ensemble(self.trajectories(max_bytes, method), self.ntrials,
+                        self.nsteps, stream)
 
-        # average over ntrials
-        x_avg = np.mean(x_arr, axis=0)
-        x2_avg = np.mean(x2_arr, axis=0)
+    def exact_moments(self):
+        """
+        exact average displacement and variance after every step: the
+        direction is a 2-state markov chain with transfer matrix
+        [[p, 1-p], [1-p, p]], whose eigenvalues 1 and r = 2p - 1 give
+        <d_j d_k> = r**|k-j| with d_0 = 1, so that
+        <x_n> = r + ... + r**n and <x_n^2> = <x_{n-1}^2> + 2<x_{n-1}> + 1
+        """
+        r = 2 * self.p - 1
+        x_avg = np.zeros(self.nsteps + 1)
+        x_avg[1:] = np.cumsum(r ** np.arange(1, self.nsteps + 1))
+        x2_avg = np.zeros(self.nsteps + 1)
+        x2_avg[1:] = np.cumsum(2 * x_avg[:-1] + 1)
         sigma2 = x2_avg - x_avg * x_avg
-        return x_arr, visited_sites, x_avg, sigma2
+        return x_avg, sigma2
 
     def sites_visited(self):
         """count the number of distinct sites visited
@@ -108,9 +129,17 @@ class PersistentRandomWalk1D:
             visited_sites[x] = visited_sites.get(x, 0) + 1
         return count
 
-    def average_sites_visited(self):
+    def average_sites_visited(self, method='vectorized', max_bytes=2**28):
         """compute the average number of distinct sites visited during
-        the course of n steps over n trials or walkers."""
+        the course of n steps over n trials or walkers; method 'vectorized'
+        counts running max - running min + 1 over chunks of trajectories
+        and 'loop' counts the sites of every trial in python.
+        """
+        if method == 'vectorized':
+            return mean_sites_count(self.trajectories(max_bytes), self.ntrials,
+                                    self.nsteps)
+        if method != 'loop':
+            raise ValueError("method must be 'vectorized' or 'loop'")
         arr = np.zeros((self.ntrials, self.nsteps + 1))
         for i in range(self.ntrials):
             count = self.sites_visited()
@@ -4,8 +4,44 @@
 # Class: 1D Random Walk
 ############################
 import math
+from functools import lru_cache
 import numpy as np
 from numpy.random import rand
+from ensemble import ensemble, mean_sites_count
+
+# exact log(k!) below the range of the stirling series
+LOG_FACTORIAL = np.array([math.lgamma(k + 1) for k in range(20)])
+
+
+def log_factorial(k):
+    """log(k!) of an integer array: table for k < 20, stirling series
+    (error below 1e-14) otherwise.
+    """
+    k = np.asarray(k)
+    x = np.maximum(k, 20).astype(float)
+    stirling = (x * np.log(x) - x + 0.5 * np.log(2 * np.pi * x) +
+                1 / (12 * x) - 1 / (360 * x**3) + 1 / (1260 * x**5) -
+                1 / (1680 * x**7))
+    return np.where(k < 20, LOG_FACTORIAL[np.minimum(k, 19)], stirling)
+
+
+@lru_cache(maxsize=32)
+def binomial_dist(nsteps, p):
+    """
+    binomial distribution P(x,n) of the displacement x = 2k - n after
+    n steps for all reachable x, from log binomial coefficients; cached
+    on (nsteps, p) and returned as read-only arrays
+    """
+    k = np.arange(nsteps + 1)   # number of steps to the right
+    logc = log_factorial(nsteps) - log_factorial(k) - log_factorial(nsteps - k)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logp = (np.where(k > 0, k * np.log(p), 0) +
+                np.where(k < nsteps, (nsteps - k) * np.log1p(-p), 0))
+    x_pos = 2 * k - nsteps
+    prob = np.exp(logc + logp)
+    x_pos.setflags(write=False)
+    prob.setflags(write=False)
+    return x_pos, prob
 
 
 class RandomWalk1D:
@@ -31,31 +67,44 @@ class RandomWalk1D:
         self.ntrials = ntrials
         self.p = p
 
-    def monte_carlo(self):
-        """monte carlo simulation."""
-        x_arr = np.zeros((self.ntrials, self.nsteps + 1))
-        x2_arr = np.zeros((self.ntrials, self.nsteps + 1))
-        visited_sites = {}  # map visited sites to count after n steps
-        for i in range(self.ntrials):
-            x = 0   # initial position
-            for j in range(self.nsteps):
-                if rand() <= self.p:
-                    x += 1
-                else:
-                    x -= 1
-
-                # update the position array at each n steps
-                x_arr[i][j + 1] = x
-                x2_arr[i][j + 1] = x * x
-
-            # update visited sites after n steps
-            visited_sites[x] = visited_sites.get(x, 0) + 1
-
-        # average over ntrials
-        x_avg = np.mean(x_arr, axis=0)
-        x2_avg = np.mean(x2_arr, axis=0)
-        sigma2 = x2_avg - x_avg * x_avg
-        return x_arr, visited_sites, x_avg, sigma2
+    def trajectories(self, max_bytes=2**28, method='vectorized'):
+        """
+        generate the positions of all trials in chunks of trials that stay
+        below max_bytes; method 'vectorized' draws the steps as int8 +1/-1
+        blocks and sums them along the step axis into int32 positions, and
+        'loop' steps every trial in python
+        """
+        if method not in ('vectorized', 'loop'):
+            raise ValueError("method must be 'vectorized' or 'loop'")
+        rows = max(1, int(max_bytes // (16*(self.nsteps + 1))))
+        for start in range(0, self.ntrials, rows):
+            n = min(rows, self.ntrials - start)
+            if method == 'vectorized':
+                steps = 2*(rand(n, self.nsteps) <= self.p).view(np.int8) - 1
+                pos = np.zeros((n, self.nsteps + 1), dtype=np.int32)
+                np.cumsum(steps, axis=1, dtype=np.int32, out=pos[:, 1:])
+                yield pos
+                del pos   # free the chunk before drawing the next one
+                continue
+
+            pos = np.zeros((n, self.nsteps + 1), dtype=np.int64)
+            for i in range(n):
+                x = 0   # initial position
+                for j in range(self.nsteps):
+                    if rand() <= self.p:
+                        x += 1
+                    else:
+                        x -= 1
+                    pos[i, j + 1] = x
+            yield pos
+            del pos   # free the chunk before drawing the next one
+
+    def monte_carlo(self, max_bytes=2**28, stream=False, method='vectorized'):
+        """monte carlo simulation; with stream=True only per-step moments
+        are kept and x_arr is returned as None.
+        """
+        return ensemble(self.trajectories(max_bytes, method), self.ntrials,
+                        self.nsteps, stream)
 
     def sites_visited(self):
         """count the number of distinct sites visited
@@ -81,10 +130,17 @@ class RandomWalk1D:
             visited_sites[x] = visited_sites.get(x, 0) + 1
         return count
 
-    def average_sites_visited(self):
+    def average_sites_visited(self, method='vectorized', max_bytes=2**28):
         """compute the average number of distinct sites visited during
-        the course of n steps over n trials or walkers.
+        the course of n steps over n trials or walkers; method 'vectorized'
+        counts running max - running min + 1 over chunks of trajectories
+        and 'loop' counts the sites of every trial in python.
         """
+        if method == 'vectorized':
+            return mean_sites_count(self.trajectories(max_bytes), self.ntrials,
+                                    self.nsteps)
+        if method != 'loop':
+            raise ValueError("method must be 'vectorized' or 'loop'")
         arr = np.zeros((self.ntrials, self.nsteps + 1))
         for i in range(self.ntrials):
             count = self.sites_visited()
@@ -92,66 +148,80 @@ class RandomWalk1D:
         mean_count = np.mean(arr, axis=0)
         return mean_count
 
-    def exact_dist(self):
-        """the exact probability P(x,n) that the displacement
-        of the walker is x after n steps, given by the
-        binomial distribution.
+    def exact_dist(self, visited_sites=None):
+        """
+        the exact probability P(x,n) that the displacement of the walker
+        is x after n steps, given by the binomial distribution; evaluated
+        in log space for all reachable x at once, or only at the sites of
+        an existing histogram visited_sites from monte_carlo, where sites
+        not reachable in n steps (|x| > n or x of the wrong parity) get 0
         """
-        _, hashmap, _, _ = self.monte_carlo()
-        x_pos = list(hashmap.keys())
-        prob = [0] * len(x_pos)
-
-        for i in range(len(x_pos)):
-            k = (self.nsteps + x_pos[i]) / 2
-            dem = math.factorial(self.nsteps - k) * math.factorial(k)
-            coeff = math.factorial(self.nsteps) / dem
-            prob[i] = coeff * (self.p**k) * (1 - self.p) ** (self.nsteps - k)
-        return x_pos, prob
-
-    def gaussian_approx(self, const):
+        x_pos, prob = binomial_dist(self.nsteps, self.p)
+        if visited_sites is None:
+            return x_pos, prob
+        x = np.array(sorted(visited_sites), dtype=np.int64)
+        reachable = (np.abs(x) <= self.nsteps) & ((x + self.nsteps) % 2 == 0)
+        k = np.where(reachable, (x + self.nsteps) // 2, 0)
+        return x, np.where(reachable, prob[k], 0.0)
+
+    def gaussian_approx(self, const, visited_sites=None):
         """gaussian approximation of the position distribution
-        for large n steps.
+        for large n steps, at all reachable x or at the sites of
+        an existing histogram visited_sites.
         """
-        _, hashmap, _, _ = self.monte_carlo()
-        x_pos = list(hashmap.keys())
+        if visited_sites is None:
+            x_pos = np.arange(-self.nsteps, self.nsteps + 1, 2)
+        else:
+            x_pos = np.array(sorted(visited_sites))
 
         xbar = self.nsteps * (2 * self.p - 1)   # exact average for large n
         sigma2 = (
             4 * self.nsteps * self.p * (1 - self.p)
         )   # exact average for large n
-        gau_prob = [0] * len(x_pos)
-
-        for i in range(len(x_pos)):
-            coeff = const / np.sqrt(2 * np.pi * sigma2)
-            gau_prob[i] = coeff * np.exp(
-                -((x_pos[i] - xbar) ** 2) / (2 * sigma2)
-            )
+        coeff = const / np.sqrt(2 * np.pi * sigma2)
+        gau_prob = coeff * np.exp(-((x_pos - xbar) ** 2) / (2 * sigma2))
         return x_pos, gau_prob
 
-    def exact_enumeration(self):
-        """evaluate averages by exactly enumerating all the possible walks
-        for a given n steps at p = 0.5; there are 2**n possible walks.
-        note: this should be done for very small n steps
+    def exact_enumeration(self, steps=None, nfft=2000):
+        """
+        evaluate averages by exactly enumerating all the possible walks of
+        n steps: the position distribution is propagated by convolution with
+        the step distribution, step by step while the support is small and
+        by an fft power once n*(smax - smin) > nfft; steps maps integer step
+        lengths to their probabilities (default {1: p, -1: 1-p})
         """
-        all_pos = [c for c in range(-self.nsteps, self.nsteps + 1)]
-        actual_pos = []   # x positions after n steps (equiprobable events)
-        for x in all_pos:
-            k = (self.nsteps + x) / 2   # number of steps to the right
-            if 2 * k % 2 == 0:
-                # the binomial coefficients count how many walks ended at x
-                dem = math.factorial(self.nsteps - int(k)) * math.factorial(
-                    int(k)
-                )
-                bino_coeff = math.factorial(self.nsteps) / dem
-                for _ in np.arange(bino_coeff):
-                    actual_pos.append(x)
+        if steps is None:
+            steps = {1: self.p, -1: 1 - self.p}
+        lengths = np.array(list(steps.keys()))
+        if not np.all(lengths == np.round(lengths)):
+            raise ValueError('step lengths must be integers')
+        lengths = lengths.astype(np.int64)
+        if abs(sum(steps.values()) - 1) > 1e-12:
+            raise ValueError('step probabilities must sum to 1')
+
+        # step distribution on the sites smin, ..., smax
+        smin, smax = lengths.min(), lengths.max()
+        kernel = np.zeros(smax - smin + 1)
+        np.add.at(kernel, lengths - smin, list(steps.values()))
+
+        size = self.nsteps * (smax - smin) + 1   # sites reachable after n steps
+        if size - 1 <= nfft:
+            prob = np.ones(1)
+            for _ in range(self.nsteps):
+                prob = np.convolve(prob, kernel)
+        else:
+            nfreq = 1 << int(size - 1).bit_length()   # power of 2 >= size
+            prob = np.fft.irfft(np.fft.rfft(kernel, nfreq)**self.nsteps, nfreq)
+            prob = prob[:size]
+            # zero the probabilities below the fft round-off level
+            prob[prob < np.finfo(float).eps * nfreq * prob.max()] = 0
+            prob /= prob.sum()
+        x_pos = np.arange(size) + self.nsteps * smin
 
         # compute averages
-        # 0 for p = 0.5
-        x_avg = sum([x for x in actual_pos]) / 2**self.nsteps
-        # nsteps for p = 0.5
-        x2_avg = sum([x * x for x in actual_pos]) / 2**self.nsteps
-        return actual_pos, x_avg, x2_avg
+        x_avg = x_pos @ prob
+        x2_avg = ((x_pos - x_avg)**2) @ prob + x_avg * x_avg
+        return x_pos, prob, x_avg, x2_avg
 
 
 # if __name__ == "__main__":
@@ -8,6 +8,30 @@ from numpy.random import rand
 import random
 
 
+def ruin_time(k, G, p):
+    """
+    mean number of steps before a walker at distance k from the trap on
+    its left is trapped in a gap of G bonds between two traps (gambler's
+    ruin): (G(1 - u) - k)/(2p - 1) with u the probability of reaching
+    the left trap first, or k(G - k) at p = 1/2
+    """
+    k = np.asarray(k, dtype=float)
+    G = np.asarray(G, dtype=float)
+    q = 1 - p
+    if p == q:
+        return k * (G - k)
+    if p == 0 or p == 1:
+        return k if p == 0 else G - k
+    with np.errstate(invalid='ignore'):
+        if q < p:
+            logr = np.log(q / p)
+            u = np.exp(k * logr) * np.expm1((G - k) * logr) / np.expm1(G * logr)
+        else:
+            logs = np.log(p / q)
+            u = np.expm1((G - k) * logs) / np.expm1(G * logs)
+    return np.where(k == 0, 0, (G * (1 - u) - k) / (p - q))
+
+
 class RandomlyDistributedTrap:
     """monte carlo simulation of one-dimensional random walk
     on lattices with randomly distributed traps.
@@ -40,17 +64,38 @@ class RandomlyDistributedTrap:
         """lattice with randomly distributed sites and site label:
         traps = 0 and nontraps = 1.
         """
-        sites = np.zeros(self.L, dtype=dtype)   # lattice sites
-        site_label = np.zeros(self.L, dtype=dtype)   # site labels
-        for i in range(len(sites)):
-            if rand() <= self.rho:
-                site_label[i] = 0   # trap label
-                sites[i] = i   # trap sites
-            else:
-                site_label[i] = 1   # nontrap label
-                sites[i] = i   # nontrap sites
+        sites = np.arange(self.L).astype(dtype)   # lattice sites
+        site_label = self.configurations(1, dtype)[0]   # site labels
         return sites, site_label
 
+    def configurations(self, K, dtype=bool):
+        """site labels of K trap configurations drawn as one (K, L)
+        bernoulli array: a site is a trap (0) with probability rho.
+        """
+        return (rand(K, self.L) > self.rho).astype(dtype, copy=False)
+
+    def configuration_pool(self, K, nwalkers):
+        """
+        number of steps before being trapped for nwalkers walkers on each of
+        K trap configurations, drawn once; all K*nwalkers walkers start at
+        random sites and advance together on an int32 position vector with
+        periodic boundary condition by modular arithmetic; returns a (K,
+        nwalkers) array of counts
+        """
+        site_label = self.configurations(K)
+        config = np.repeat(np.arange(K), nwalkers)   # configuration of each walker
+        x = np.random.randint(self.L, size=K * nwalkers).astype(np.int32)
+        count = np.zeros(K * nwalkers, dtype=np.int64)
+        live = np.ones(K * nwalkers, dtype=bool)
+        for _ in range(self.nsteps):
+            live &= site_label[config, x]   # walk terminates at the trap sites
+            if not live.any():
+                break
+            step = 2*(rand(len(x)) <= self.p).view(np.int8) - 1
+            x = np.where(live, (x + step) % self.L, x).astype(np.int32)
+            count += live
+        return count.reshape(K, nwalkers)
+
     def step_count_b4_trap(self):
         """count the number of steps before being trapped
         at site_label[x] = 0.
@@ -81,10 +126,51 @@ class RandomlyDistributedTrap:
             traj.append(x)
         return traj, count
 
-    def average_nsteps_trap(self):
+    def exact_nsteps_trap(self, site_label):
+        """
+        exact mean number of steps before a walker started at a random site
+        is trapped, for each trap configuration (row of site_label, traps
+        = 0) with no cap on the number of steps; the previous and next trap
+        of every site follow from running extrema of the trap positions
+        over the periodic lattice, and each site contributes the gambler's
+        ruin time of its trap-free segment; in configurations without traps
+        the walker is never trapped and takes all nsteps steps
+        """
+        trap = np.atleast_2d(np.asarray(site_label) == 0)
+        idx = np.arange(2 * self.L)
+        trap2 = np.concatenate([trap, trap], axis=1)   # periodic copy
+        prev = np.maximum.accumulate(np.where(trap2, idx, -1), axis=1)
+        nxt = np.minimum.accumulate(np.where(trap2, idx, 2 * self.L)[:, ::-1],
+                                    axis=1)[:, ::-1]
+        prev = prev[:, self.L:] - self.L   # previous trap of sites 0, ..., L-1
+        nxt = nxt[:, :self.L]   # next trap of sites 0, ..., L-1
+        k = np.arange(self.L) - prev   # distance to the previous trap
+        G = nxt - prev   # length of the segment
+        mean = ruin_time(k, G, self.p).mean(axis=1)
+        return np.where(trap.any(axis=1), mean, self.nsteps)
+
+    def average_nsteps_trap(self, method='loop', max_bytes=2**28, nconfigs=None):
         """mean number of steps before the walker is trapped;
-        this is called the mean survival time or the mean first passage time.
+        this is called the mean survival time or the mean first passage time;
+        method 'pool' runs about ntrials walkers spread over nconfigs trap
+        configurations with configuration_pool, and 'exact' averages
+        exact_nsteps_trap over ntrials trap configurations (no cap at
+        nsteps for configurations with traps).
         """
+        if method == 'exact':
+            total = 0.0
+            rows = max(1, int(max_bytes // (64 * self.L)))
+            for start in range(0, self.ntrials, rows):
+                n = min(rows, self.ntrials - start)
+                site_label = self.configurations(n)
+                total += self.exact_nsteps_trap(site_label).sum()
+            return total / self.ntrials
+        if method == 'pool':
+            nconfigs = self.ntrials if nconfigs is None else nconfigs
+            nwalkers = -(-self.ntrials // nconfigs)   # walkers per configuration
+            return self.configuration_pool(nconfigs, nwalkers).mean()
+        if method != 'loop':
+            raise ValueError("method must be 'loop', 'pool' or 'exact'")
         step_count = np.zeros(self.ntrials)
         for i in range(len(step_count)):
             _, count = self.step_count_b4_trap()
@@ -126,8 +212,54 @@ class RandomlyDistributedTrap:
             w = np.zeros(self.L)   # use the same number of walkers
         return proba_trap_config
 
-    def average_survival_proba(self):
-        """mean survival probability over several trap configurations."""
+    def survival_proba(self, site_label, dtype=float, total=False):
+        """
+        survival probability of a stack of trap configurations, one per
+        row of site_label (traps = 0), propagated together by exact
+        enumeration with np.roll neighbour sums; dtype=np.float32 halves
+        the memory, and with total=True only the sum over configurations
+        is accumulated, step by step, into one (nsteps + 1) vector
+        """
+        w = np.asarray(site_label, dtype=dtype)
+        if total:
+            proba = np.zeros(self.nsteps + 1)
+            proba[0] = len(w)   # for initial trap configurations
+        else:
+            proba = np.zeros((len(w), self.nsteps + 1))   # survival probability
+            proba[:, 0] = 1   # for initial trap configuration
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for i in range(self.nsteps):
+                nbr = np.roll(w, -1, axis=1)
+                nbr += np.roll(w, 1, axis=1)
+                nbr /= 2
+                nbr[w == 0] = 0   # traps do not move
+                w = nbr
+                step = w.sum(axis=1, dtype=float) / np.count_nonzero(w, axis=1)
+                if total:
+                    proba[i + 1] = step.sum()
+                else:
+                    proba[:, i + 1] = step
+        return proba
+
+    def average_survival_proba(self, method='vectorized', dtype=float,
+                               max_bytes=2**28):
+        """mean survival probability over several trap configurations;
+        method 'vectorized' propagates chunks of configurations at once
+        with survival_proba, summing over them step by step, and 'loop'
+        one configuration at a time.
+        """
+        if method == 'vectorized':
+            total = np.zeros(self.nsteps + 1)
+            # the labels, their neighbour sum and one np.roll per row
+            rows = max(1, int(max_bytes // (4*np.dtype(dtype).itemsize*self.L)))
+            for start in range(0, self.ntrials, rows):
+                n = min(rows, self.ntrials - start)
+                site_label = self.configurations(n)
+                total += self.survival_proba(site_label, dtype, total=True)
+                del site_label
+            return total / self.ntrials
+        if method != 'loop':
+            raise ValueError("method must be 'vectorized' or 'loop'")
         arr = np.zeros((self.ntrials, self.nsteps + 1))
         for i in range(self.ntrials):
             proba_trap_config = self.exact_enumeration_proba()
@@ -5,6 +5,7 @@
 ####################################
 import numpy as np
 from numpy.random import rand
+from ensemble import ensemble, mean_sites_count
 
 
 class RestrictedRandomWalk1D:
@@ -34,13 +35,12 @@ class RestrictedRandomWalk1D:
 
     def step_count_b4_trap(self):
         """count the number of steps before being trapped at x = 0 and x = L."""
-        lat = [t for t in range(self.L + 1)]   # lattice sites
         traj = []   # trajectory of the walker
-        x = lat[self.L // 2]   # starting position
+        x = self.L // 2   # starting position
         count = 0   # count total number of steps before being trapped
         for _ in range(self.nsteps):
             # walk terminates at the trap sites
-            if x == lat[0] or x == lat[self.L]:
+            if x == 0 or x == self.L:
                 break
 
             # random walk
@@ -54,27 +54,121 @@ class RestrictedRandomWalk1D:
             traj.append(x)
         return traj, count
 
-    def average_nsteps_trap(self):
+    def first_passage(self, compact=32):
+        """
+        advance all ntrials walkers from x = L // 2 together until they are
+        trapped at x = 0 or x = L or take nsteps steps; trapped walkers are
+        frozen and dropped from the active set every compact steps, so the
+        cost follows the number of live walkers; returns the histograms
+        hist0, histL of the step at which walkers were trapped at x = 0 and
+        x = L, and the number of walkers never trapped
+        """
+        hist0 = np.zeros(self.nsteps + 1, dtype=np.int64)
+        histL = np.zeros(self.nsteps + 1, dtype=np.int64)
+        x = np.full(self.ntrials, self.L // 2, dtype=np.int32)
+        hist0[0] = np.count_nonzero(x == 0)
+        histL[0] = np.count_nonzero(x == self.L)
+        x = x[(x != 0) & (x != self.L)]   # active set
+        live = np.ones(len(x), dtype=bool)
+        for t in range(1, self.nsteps + 1):
+            if len(x) == 0:
+                break
+            x += (2*(rand(len(x)) <= self.p).view(np.int8) - 1) * live
+            trap0 = live & (x == 0)
+            trapL = live & (x == self.L)
+            hist0[t] = np.count_nonzero(trap0)
+            histL[t] = np.count_nonzero(trapL)
+            live &= ~(trap0 | trapL)
+            if t % compact == 0:
+                x = x[live]   # drop trapped walkers
+                live = live[live]
+        survivors = self.ntrials - hist0.sum() - histL.sum()
+        return hist0, histL, survivors
+
+    def exact_first_passage(self):
+        """
+        exact first passage distribution of the walker started at x = L // 2:
+        the probabilities of the interior sites 1, ..., L-1 are propagated
+        for nsteps steps with the 3-point stencil of the markov chain in
+        O(L nsteps); returns the probabilities hist0, histL of being trapped
+        at x = 0 and x = L at each step and the survival probability
+        """
+        q = 1 - self.p
+        hist0 = np.zeros(self.nsteps + 1)
+        histL = np.zeros(self.nsteps + 1)
+        x = self.L // 2   # starting position
+        if x == 0 or x == self.L:
+            hist0[0], histL[0] = x == 0, x == self.L
+            return hist0, histL, 0.0
+
+        prob = np.zeros(self.L - 1)   # probability of sites 1, ..., L-1
+        prob[x - 1] = 1
+        for t in range(1, self.nsteps + 1):
+            hist0[t] = q * prob[0]
+            histL[t] = self.p * prob[-1]
+            new = np.zeros(self.L - 1)
+            new[1:] += self.p * prob[:-1]   # step right
+            new[:-1] += q * prob[1:]   # step left
+            prob = new
+        return hist0, histL, prob.sum()
+
+    def gamblers_ruin(self):
+        """
+        probability u of being trapped at x = 0 and mean number of steps T
+        before being trapped for a walker started at x = L // 2 with no cap
+        on the number of steps: u = (r^x - r^L)/(1 - r^L) with r = (1-p)/p,
+        written with expm1 so that it does not overflow for large L, and
+        T = (L(1 - u) - x)/(2p - 1), or x(L - x) at p = 1/2
+        """
+        p, q, L = self.p, 1 - self.p, self.L
+        x = L // 2   # starting position
+        if p == q:
+            return 1 - x / L, float(x * (L - x))
+        if p == 0 or p == 1:
+            return float(p == 0), float(x if p == 0 else L - x)
+        if q < p:   # r < 1
+            logr = np.log(q / p)
+            u = np.exp(x * logr) * np.expm1((L - x) * logr) / np.expm1(L * logr)
+        else:   # 1/r < 1
+            logs = np.log(p / q)
+            u = np.expm1((L - x) * logs) / np.expm1(L * logs)
+        return u, (L * (1 - u) - x) / (p - q)
+
+    def average_nsteps_trap(self, method='vectorized'):
         """mean number of steps for the walker to be trapped;
-        this is called the mean first passage time.
+        this is called the mean first passage time; method 'exact'
+        evaluates it from exact_first_passage (capped at nsteps like
+        the simulation) and 'ruin' from gamblers_ruin (no cap).
         """
-        step_count = np.zeros(self.ntrials)
-        for i in range(len(step_count)):
-            _, count = self.step_count_b4_trap()
-            step_count[i] = count
-        return np.mean(step_count)
+        if method == 'ruin':
+            return self.gamblers_ruin()[1]
+        if method == 'loop':
+            step_count = np.zeros(self.ntrials)
+            for i in range(len(step_count)):
+                _, count = self.step_count_b4_trap()
+                step_count[i] = count
+            return np.mean(step_count)
+        if method == 'exact':
+            hist0, histL, survivors = self.exact_first_passage()
+            ntrials = 1
+        elif method == 'vectorized':
+            hist0, histL, survivors = self.first_passage()
+            ntrials = self.ntrials
+        else:
+            raise ValueError("method must be 'vectorized', 'exact', 'ruin' or 'loop'")
+        t = np.arange(self.nsteps + 1)
+        return (t @ (hist0 + histL) + self.nsteps*survivors) / ntrials
 
     def step_count_b4_trap0(self):
         """count when walker gets trapped at x = 0."""
-        lat = [t for t in range(self.L + 1)]   # lattice sites
-        x = lat[self.L // 2]   # starting position
+        x = self.L // 2   # starting position
         count = 0   # count the number of times the walker hits x = 0
-        for _ in range(self.nsteps):
+        for _ in range(self.nsteps + 1):
             # walk terminates at the trap sites
-            if x == lat[0]:
+            if x == 0:
                 count += 1
                 break
-            elif x == lat[self.L]:
+            elif x == self.L:
                 break
 
             # random walk
@@ -84,45 +178,131 @@ class RestrictedRandomWalk1D:
                 x -= 1
         return count
 
-    def prob_trap(self):
-        """probability of the walker being trapped at x = 0."""
+    def prob_trap(self, method='vectorized'):
+        """probability of the walker being trapped at x = 0; method
+        'exact' and 'ruin' as in average_nsteps_trap.
+        """
+        if method == 'ruin':
+            return self.gamblers_ruin()[0]
+        if method == 'exact':
+            return self.exact_first_passage()[0].sum()
+        if method == 'vectorized':
+            hist0, _, _ = self.first_passage()
+            return hist0.sum() / self.ntrials
+        if method != 'loop':
+            raise ValueError("method must be 'vectorized', 'exact', 'ruin' or 'loop'")
         count = 0
         for _ in range(self.ntrials):
             count += self.step_count_b4_trap0()
         return count / self.ntrials
 
-    def reflecting_boundaries(self):
-        """monte carlo simulation of reflected boundary random walk."""
-        x_arr = np.zeros((self.ntrials, self.nsteps + 1))
-        x2_arr = np.zeros((self.ntrials, self.nsteps + 1))
-        visited_sites = {}  # track visited sites and their count
-        lat = [t for t in range(-self.L, self.L + 1)]   # lattice sites
-        for i in range(self.ntrials):
-            x = 0   # initial position
-            for j in range(self.nsteps):
-                if rand() <= self.p:
-                    if x == lat[2 * self.L]:  # right reflection site
-                        x -= 1
-                    else:
-                        x += 1
-                else:
-                    if x == lat[0]:   # left reflection site
-                        x += 1
+    def reflecting_trajectories(self, max_bytes=2**28, method='vectorized'):
+        """
+        generate the positions of all trials of the reflected boundary walk
+        in chunks of trials that stay below max_bytes; method 'vectorized'
+        advances a whole chunk per step on an int16 (int32 for L >= 2**14)
+        position vector and reflects with np.where, and 'loop' steps every
+        trial in python; int16 is used only when the site indices x + L
+        and the site counts, up to 2L + 1, fit in it as well
+        """
+        if method not in ('vectorized', 'loop'):
+            raise ValueError("method must be 'vectorized' or 'loop'")
+        dtype = np.int16 if 2 * self.L + 1 < 2**15 else np.int32
+        if method == 'loop':
+            dtype = np.int64
+        size = np.dtype(dtype).itemsize
+        # positions, the same again for the deviations formed by
+        # Moments.push, and the random numbers and steps of one step
+        rows = max(1, int(max_bytes // (2*size*(self.nsteps + 1) + 64)))
+        for start in range(0, self.ntrials, rows):
+            pos = np.zeros((min(rows, self.ntrials - start), self.nsteps + 1),
+                           dtype=dtype)
+            if method == 'vectorized':
+                x = pos[:, 0].copy()   # initial position
+                for j in range(self.nsteps):
+                    right = rand(len(x)) <= self.p
+                    # step right unless at x = L, step left unless at x = -L
+                    x += np.where(right, np.where(x == self.L, -1, 1),
+                                  np.where(x == -self.L, 1, -1)).astype(dtype)
+                    pos[:, j + 1] = x
+                yield pos
+                del pos   # free the chunk before drawing the next one
+                continue
+
+            for i in range(len(pos)):
+                x = 0   # initial position
+                for j in range(self.nsteps):
+                    if rand() <= self.p:
+                        if x == self.L:  # right reflection site
+                            x -= 1
+                        else:
+                            x += 1
                     else:
-                        x -= 1
+                        if x == -self.L:   # left reflection site
+                            x += 1
+                        else:
+                            x -= 1
+                    pos[i, j + 1] = x
+            yield pos
+            del pos   # free the chunk before drawing the next one
 
-                # update the position array at each n steps
-                x_arr[i][j + 1] = x
-                x2_arr[i][j + 1] = x * x
+    def reflecting_boundaries(self, max_bytes=2**28, stream=False,
+                              method='vectorized'):
+        """monte carlo simulation of reflected boundary random walk; with
+        stream=True only per-step moments are kept and x_arr is None.
+        """
+        return ensemble(self.reflecting_trajectories(max_bytes, method),
+                        self.ntrials, self.nsteps, stream)
 
-            # update visited sites after n steps
-            visited_sites[x] = visited_sites.get(x, 0) + 1
+    def reflecting_histogram(self, max_bytes=2**28):
+        """number of trials ending at each site -L, ..., L of the reflected
+        boundary walk, counted with np.bincount.
+        """
+        hist = np.zeros(2 * self.L + 1, dtype=np.int64)
+        for pos in self.reflecting_trajectories(max_bytes):
+            hist += np.bincount(pos[:, -1] + self.L, minlength=2 * self.L + 1)
+        return hist
 
-        # average over ntrials
-        x_avg = np.mean(x_arr, axis=0)
-        x2_avg = np.mean(x2_arr, axis=0)
+    def reflecting_exact(self):
+        """
+        exact distribution of the reflected boundary walk on the sites
+        -L, ..., L after nsteps steps from the transition matrix (a 3-point
+        stencil with reflection at x = -L and x = L), together with the
+        exact average displacement and variance after every step
+        """
+        q = 1 - self.p
+        x_pos = np.arange(-self.L, self.L + 1)
+        prob = (x_pos == 0).astype(float)   # initial position
+        x_avg = np.zeros(self.nsteps + 1)
+        x2_avg = np.zeros(self.nsteps + 1)
+        for t in range(1, self.nsteps + 1):
+            new = np.zeros(len(prob))
+            new[2:] += self.p * prob[1:-1]   # step right
+            new[:-2] += q * prob[1:-1]   # step left
+            new[1] += prob[0]   # left reflection site
+            new[-2] += prob[-1]   # right reflection site
+            prob = new
+            x_avg[t] = x_pos @ prob
+            x2_avg[t] = (x_pos * x_pos) @ prob
         sigma2 = x2_avg - x_avg * x_avg
-        return x_arr, visited_sites, x_avg, sigma2
+        return x_pos, prob, x_avg, sigma2
+
+    def reflecting_stationary(self):
+        """
+        stationary distribution of the reflected boundary walk from detailed
+        balance, pi(x+1)/pi(x) = p/(1-p) inside the lattice with the rates 1
+        at the reflection sites; the chain has period 2, so this is the
+        long-time average of the distribution rather than its limit
+        """
+        if not 0 < self.p < 1:
+            raise ValueError('stationary distribution needs 0 < p < 1')
+        q = 1 - self.p
+        logratio = np.full(2 * self.L, np.log(self.p / q))
+        logratio[0] = -np.log(q)   # pi(-L+1)/pi(-L) = 1/q
+        logratio[-1] = np.log(self.p)   # pi(L)/pi(L-1) = p
+        logpi = np.concatenate([[0], np.cumsum(logratio)])
+        prob = np.exp(logpi - logpi.max())
+        return np.arange(-self.L, self.L + 1), prob / prob.sum()
 
     def sites_visited(self):
         """count the number of distinct sites visited
@@ -157,10 +337,17 @@ class RestrictedRandomWalk1D:
             visited_sites[x] = visited_sites.get(x, 0) + 1
         return count
 
-    def average_sites_visited(self):
+    def average_sites_visited(self, method='vectorized', max_bytes=2**28):
         """compute the average number of distinct sites visited during
-        the course of n steps over n trials or walkers.
+        the course of n steps over n trials or walkers; method 'vectorized'
+        counts running max - running min + 1 over chunks of trajectories
+        and 'loop' counts the sites of every trial in python.
         """
+        if method == 'vectorized':
+            return mean_sites_count(self.reflecting_trajectories(max_bytes), self.ntrials,
+                                    self.nsteps)
+        if method != 'loop':
+            raise ValueError("method must be 'vectorized' or 'loop'")
         arr = np.zeros((self.ntrials, self.nsteps + 1))
         for i in range(self.ntrials):
             count = self.sites_visited()
@@ -5,6 +5,7 @@
 ####################################
 import numpy as np
 from numpy.random import rand
+from ensemble import ensemble, mean_sites_count
 
 
 class TrueSelfAvoidingWalk1D:
@@ -30,62 +31,91 @@ class TrueSelfAvoidingWalk1D:
         self.ntrials = ntrials
         self.g = g
 
-    def monte_carlo(self):
-        """monte carlo simulation."""
-        x_arr = np.zeros((self.ntrials, self.nsteps + 1))
-        x2_arr = np.zeros((self.ntrials, self.nsteps + 1))
-        visited_sites = {}  # map visited sites to count after n steps
-        for i in range(self.ntrials):
-            nv = np.zeros(2 * self.nsteps + 1)   # number of visits to x
-            x = 0   # initial position
-            nv[0] = 1   # initial position counted as 1
-            for j in range(self.nsteps):
-                deno = np.exp(-self.g * nv[x + 1]) + np.exp(-self.g * nv[x - 1])
-                p = (
-                    np.exp(-self.g * nv[x + 1]) / deno
-                )   # probability to jump to x+1
-                if rand() <= p:
-                    x += 1   # step right
-                    nv[x] += 1   # update the number of visits to x
-                else:
-                    x -= 1   # step left
-                    nv[x] += 1   # update the number of visits to x
-
-                # update the position array at each n steps
-                x_arr[i][j + 1] = x
-                x2_arr[i][j + 1] = x * x
+    def trajectories(self, max_bytes=2**28, method='vectorized'):
+        """
+        generate the positions of all trials in chunks of trials that stay
+        below max_bytes; method 'vectorized' advances a whole chunk per step
+        with a (trials, 2*nsteps+1) uint16 (uint32 for long walks) visit
+        count matrix whose column nsteps is the origin, and looks up the
+        probability to jump to x+1, exp(-g n(x+1))/(exp(-g n(x+1)) +
+        exp(-g n(x-1))) = 1/(1 + exp(g (n(x+1) - n(x-1)))), in a table
+        precomputed for every difference of visit counts; 'loop' steps
+        every trial in python
+        """
+        if method not in ('vectorized', 'loop'):
+            raise ValueError("method must be 'vectorized' or 'loop'")
+        n = self.nsteps
+        dtype = np.uint16 if n < 2**16 - 1 else np.uint32
+        # visit counts, positions and the deviations formed by Moments.push
+        size = np.dtype(dtype).itemsize * (2 * n + 1) + 16 * (n + 1)
+        rows = max(1, int(max_bytes // size))
+        with np.errstate(over='ignore'):
+            prob = 1 / (1 + np.exp(self.g * np.arange(-n - 1, n + 2)))
+        for start in range(0, self.ntrials, rows):
+            m = min(rows, self.ntrials - start)
+            nv = np.zeros((m, 2 * n + 1), dtype=dtype)   # number of visits to x
+            nv[:, n] = 1   # initial position counted as 1
+            if method == 'vectorized':
+                pos = np.zeros((m, n + 1), dtype=np.int32)
+                walker = np.arange(m)
+                x = np.full(m, n, dtype=np.int64)   # column of the position
+                for j in range(n):
+                    diff = nv[walker, x + 1].astype(np.int64) - nv[walker, x - 1]
+                    right = rand(m) <= prob[diff + n + 1]
+                    x += 2 * right - 1   # step right or left
+                    nv[walker, x] += 1   # update the number of visits to x
+                    pos[:, j + 1] = x - n
+                yield pos
+                del pos   # free the chunk before drawing the next one
+                continue
 
-            # update visited sites after n steps
-            visited_sites[x] = visited_sites.get(x, 0) + 1
+            pos = np.zeros((m, n + 1), dtype=np.int64)
+            for i in range(m):
+                x = 0   # initial position
+                for j in range(n):
+                    deno = np.exp(-self.g * nv[i, n + x + 1]) + np.exp(-self.g * nv[i, n + x - 1])
+                    p = (
+                        np.exp(-self.g * nv[i, n + x + 1]) / deno
+                    )   # probability to jump to x+1
+                    if rand() <= p:
+                        x += 1   # step right
+                    else:
+                        x -= 1   # step left
+                    nv[i, n + x] += 1   # update the number of visits to x
+                    pos[i, j + 1] = x
+            yield pos
+            del pos   # free the chunk before drawing the next one
 
-        # average over ntrials
-        x_avg = np.mean(x_arr, axis=0)
-        x2_avg = np.mean(x2_arr, axis=0)
-        sigma2 = x2_avg - x_avg * x_avg
-        return x_arr, visited_sites, x_avg, sigma2
+    def monte_carlo(self, max_bytes=2**28, stream=False, method='vectorized'):
+        """monte carlo simulation; with stream=True only per-step moments
+        are kept and x_arr is returned as None.
+        """
+        return ensemble(self.trajectories(max_bytes, method), self.ntrials,
+                        self.nsteps, stream)
 
     def sites_visited(self):
         """count the number of distinct sites visited
         during the course of n steps.
         """
-        nv = np.zeros(2 * self.nsteps + 1)   # number of visits to x
+        n = self.nsteps   # column of the origin in nv
+        nv = np.zeros(2 * n + 1)   # number of visits to x
         count = np.zeros( self.nsteps + 1)   # no. of distinct visited sites
         visited_sites = {}   # track visited sites
         x = 0   # initial position
-        nv[0] = 1   # initial position already visited once
+        nv[n] = 1   # initial position already visited once
         count[0] = 1   # initial position counted as 1
         visited_sites[0] = 1   # initial position already visited once
         for i in range(self.nsteps):
-            deno = np.exp(-self.g * nv[x + 1]) + np.exp(-self.g * nv[x - 1])
+            deno = np.exp(-self.g * nv[n + x + 1]) + np.exp(-self.g * nv[n + x - 1])
             p = (
-                np.exp(-self.g * nv[x + 1]) / deno
+                np.exp(-self.g * nv[n + x + 1]) / deno
             )   # probability to jump to x+1
             if rand() <= p:
                 x += 1   # step right
-                nv[x] += 1   # update the number of visits to x
+                nv[n + x] += 1   # update the number of visits to x
             else:
                 x -= 1   # step left
-                nv[x] += 1   # update the number of visits to x
+                nv[n + x] += 1   # update the number of visits to x
 
             if x in visited_sites:
                 count[i + 1] = count[i]   # the same as the previous count
@@ -96,10 +126,17 @@ class TrueSelfAvoidingWalk1D:
             visited_sites[x] = visited_sites.get(x, 0) + 1
         return count
 
-    def average_sites_visited(self):
+    def average_sites_visited(self, method='vectorized', max_bytes=2**28):
         """compute the average number of distinct sites visited during
-        the course of n steps over n trials or walkers.
+        the course of n steps over n trials or walkers; method 'vectorized'
+        counts running max - running min + 1 over chunks of trajectories
+        and 'loop' counts the sites of every trial in python.
         """
+        if method == 'vectorized':
+            return mean_sites_count(self.trajectories(max_bytes), self.ntrials,
+                                    self.nsteps)
+        if method != 'loop':
+            raise ValueError("method must be 'vectorized' or 'loop'")
         arr = np.zeros((self.ntrials, self.nsteps + 1))
         for i in range(self.ntrials):
             count = self.sites_visited()
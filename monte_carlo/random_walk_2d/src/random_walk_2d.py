@@ -6,6 +6,57 @@
 import numpy as np
 import random
 
+# (x, y) displacements of the steps right, left, up and down
+DISPLACEMENT = np.array([[1, 0], [-1, 0], [0, 1], [0, -1]], dtype=np.int8)
+
+
+def merge_moments(a, b):
+    """exact merge of the (count, mean, M2) accumulators of two ensembles."""
+    na, mean_a, m2a = a
+    nb, mean_b, m2b = b
+    n = na + nb
+    delta = mean_b - mean_a
+    return n, mean_a + delta*nb/n, m2a + m2b + delta*delta*na*nb/n
+
+
+def chunk_moments(pos):
+    """
+    (count, mean, M2) accumulators of a (walkers, nsteps + 1) chunk of
+    positions; the float deviations are formed for blocks of columns so
+    that they take at most half the memory of the chunk itself
+    """
+    rows, size = pos.shape
+    mean = np.zeros(size)
+    m2 = np.zeros(size)
+    width = max(1, pos.nbytes // (32*max(rows, 1)))   # columns per block
+    for lo in range(0, size, width):
+        cols = slice(lo, lo + width)
+        dev = pos[:, cols].astype(float)
+        mean[cols] = dev.mean(axis=0)
+        dev -= mean[cols]
+        dev *= dev
+        m2[cols] = dev.sum(axis=0)
+        del dev   # free the block before the next one
+    return rows, mean, m2
+
+
+def sites_count(x_pos, y_pos):
+    """
+    number of distinct sites visited by every walker of a (walkers,
+    nsteps + 1) chunk after each step; each site is encoded as one int64,
+    (x + n)(2n + 1) + (y + n), the codes of every walker are sorted, and
+    the first occurrence of each code counts as a new site
+    """
+    n = x_pos.shape[1] - 1   # |x|, |y| <= n
+    code = (x_pos.astype(np.int64) + n) * (2 * n + 1) + (y_pos + n)
+    order = np.argsort(code, axis=1, kind='stable')
+    code = np.take_along_axis(code, order, axis=1)
+    new = np.ones(code.shape, dtype=bool)
+    new[:, 1:] = code[:, 1:] != code[:, :-1]   # first occurrence in sorted order
+    first = np.zeros(code.shape, dtype=bool)
+    np.put_along_axis(first, order, new, axis=1)
+    return np.cumsum(first, axis=1)
+
 
 class RandomWalk2D:
     """monte carlo simulation of two-dimensional random walk
@@ -29,41 +80,74 @@ class RandomWalk2D:
         self.nsteps = nsteps
         self.nwalkers = nwalkers
 
-    def monte_carlo(self):
-        """monte carlo simulation."""
-        # measured quantities
-        x_arr = np.zeros((self.nwalkers, self.nsteps + 1))
-        x2_arr = np.zeros((self.nwalkers, self.nsteps + 1))
-        y_arr = np.zeros((self.nwalkers, self.nsteps + 1))
-        y2_arr = np.zeros((self.nwalkers, self.nsteps + 1))
+    def trajectories(self, max_bytes=2**28, method='vectorized'):
+        """
+        generate the x and y positions of all walkers in chunks of walkers
+        that stay below max_bytes; method 'vectorized' draws a block of
+        uint8 direction indices per chunk, maps them through the constant
+        displacement table and sums them into int32 positions, and 'loop'
+        steps every walker in python
+        """
+        if method not in ('vectorized', 'loop'):
+            raise ValueError("method must be 'vectorized' or 'loop'")
+        # positions plus the float deviations of monte_carlo per step,
+        # budgeted for the int64 positions of the loop method
+        rows = max(1, int(max_bytes // (32*(self.nsteps + 1))))
+        for start in range(0, self.nwalkers, rows):
+            n = min(rows, self.nwalkers - start)
+            if method == 'vectorized':
+                k = np.random.randint(4, size=(n, self.nsteps), dtype=np.uint8)
+                x_pos = np.zeros((n, self.nsteps + 1), dtype=np.int32)
+                y_pos = np.zeros((n, self.nsteps + 1), dtype=np.int32)
+                np.cumsum(DISPLACEMENT[k, 0], axis=1, dtype=np.int32, out=x_pos[:, 1:])
+                np.cumsum(DISPLACEMENT[k, 1], axis=1, dtype=np.int32, out=y_pos[:, 1:])
+                yield x_pos, y_pos
+                del x_pos, y_pos   # free the chunk before drawing the next one
+                continue
 
-        for i in range(self.nwalkers):
-            x = 0
-            y = 0
-            for j in range(self.nsteps):
-                nearest_neighbors = np.array(
-                    [[x + 1.0, y], [x - 1.0, y], [x, y + 1.0], [x, y - 1.0]]
-                )
-
-                # choose a random direction and move x and y there
-                k = random.randint(0, len(nearest_neighbors) - 1)
-                x = nearest_neighbors[k, 0]
-                y = nearest_neighbors[k, 1]
-
-                # update the position arrays
-                x_arr[i][j + 1] = x
-                y_arr[i][j + 1] = y
-                x2_arr[i][j + 1] = x**2
-                y2_arr[i][j + 1] = y**2
-
-        # average over n walkers
-        x_avg = np.mean(x_arr, axis=0)
-        y_avg = np.mean(y_arr, axis=0)
-        x2_avg = np.mean(x2_arr, axis=0)
-        y2_avg = np.mean(y2_arr, axis=0)
-
-        sigma2x = x2_avg - x_avg * x_avg
-        sigma2y = y2_avg - y_avg * y_avg
+            x_pos = np.zeros((n, self.nsteps + 1), dtype=np.int64)
+            y_pos = np.zeros((n, self.nsteps + 1), dtype=np.int64)
+            for i in range(n):
+                x = 0
+                y = 0
+                for j in range(self.nsteps):
+                    nearest_neighbors = np.array(
+                        [[x + 1, y], [x - 1, y], [x, y + 1], [x, y - 1]]
+                    )
+
+                    # choose a random direction and move x and y there
+                    k = random.randint(0, len(nearest_neighbors) - 1)
+                    x = nearest_neighbors[k, 0]
+                    y = nearest_neighbors[k, 1]
+                    x_pos[i, j + 1] = x
+                    y_pos[i, j + 1] = y
+            yield x_pos, y_pos
+            del x_pos, y_pos   # free the chunk before drawing the next one
+
+    def monte_carlo(self, max_bytes=2**28, stream=False, method='vectorized'):
+        """
+        monte carlo simulation; the per-step mean and variance are merged
+        chunk by chunk (welford), and with stream=True the trajectories are
+        not stored and x_arr and y_arr are returned as None
+        """
+        x_arr = None if stream else np.zeros((self.nwalkers, self.nsteps + 1))
+        y_arr = None if stream else np.zeros((self.nwalkers, self.nsteps + 1))
+        moments = None   # (count, mean, M2) of x and y at each step
+        start = 0
+        for x_pos, y_pos in self.trajectories(max_bytes, method):
+            if not stream:
+                x_arr[start:start + len(x_pos)] = x_pos
+                y_arr[start:start + len(y_pos)] = y_pos
+            nx, mean_x, m2x = chunk_moments(x_pos)
+            _, mean_y, m2y = chunk_moments(y_pos)
+            chunk = (nx, np.stack([mean_x, mean_y]), np.stack([m2x, m2y]))
+            moments = chunk if moments is None else merge_moments(moments, chunk)
+            start += len(x_pos)
+            del x_pos, y_pos   # free the chunk before the next one is drawn
+
+        n, _, m2 = moments
+        sigma2x = m2[0] / n
+        sigma2y = m2[1] / n
         r2 = sigma2x + sigma2y
         return x_arr, y_arr, sigma2x, sigma2y, r2
 
@@ -94,10 +178,20 @@ class RandomWalk2D:
             visited_sites[(x, y)] = visited_sites.get((x, y), 0) + 1
         return count
 
-    def average_sites_visited(self):
+    def average_sites_visited(self, method='vectorized', max_bytes=2**28):
         """compute the average number of distinct sites visited during
-        the course of n steps over n walkers.
+        the course of n steps over n walkers; method 'vectorized' counts
+        the sites of chunks of walkers with sites_count and 'loop' counts
+        the sites of every walker in python.
         """
+        if method == 'vectorized':
+            total = np.zeros(self.nsteps + 1)
+            # leave room for the sort of the site codes
+            for x_pos, y_pos in self.trajectories(max_bytes // 2):
+                total += sites_count(x_pos, y_pos).sum(axis=0)
+            return total / self.nwalkers
+        if method != 'loop':
+            raise ValueError("method must be 'vectorized' or 'loop'")
         arr = np.zeros((self.nwalkers, self.nsteps + 1))
         for i in range(self.nwalkers):
             count = self.sites_visited()
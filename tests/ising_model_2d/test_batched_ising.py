@@ -0,0 +1,51 @@
+############################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Function: Test for Batched 2D Ising Model
+############################################
+
+import sys
+base_path = ''
+sys.path.append(base_path + 'monte-carlo/monte_carlo/ising_model_2d/src/')
+import numpy as np
+import pytest
+import batched_ising as bising
+import Ising_model_2d as ising
+
+def test_batched_ising():
+    # test default values
+    model = bising.BatchedIsing(6, 10, 40, 3)
+    assert model.R == 3
+
+    # test initialize and precom_expo methods
+    spinconf = model.initialize()
+    assert spinconf.shape == (3, 6, 6)
+    pw = model.precom_expo([1.5, 2.3, 3.5])
+    assert pw.shape == (3, 17)
+    assert np.allclose(pw[1], ising.Ising(6, 10, 40).precom_expo(2.3))
+
+    # test energy and magnetization per replica
+    ref = ising.Ising(6, 10, 40)
+    assert model.energy(spinconf)[2] == ref.energy(spinconf[2])
+    assert model.magnetization(spinconf)[2] == ref.magnetization(spinconf[2])
+
+    # test checkerboard method keeps running totals exact
+    ene, mag = model.checkerboard(spinconf, pw)
+    assert np.array_equal(ene, model.energy(spinconf))
+    assert np.array_equal(mag, model.magnetization(spinconf))
+
+    # test width-1 stripes (every move has zero energy change) relax
+    stripes = np.ones((3, 6, 6), dtype=np.int8)
+    stripes[:, :, 1::2] = -1
+    ene, mag = model.energy(stripes), model.magnetization(stripes)
+    assert np.all(ene == 0)
+    for _ in range(20):
+        ene, mag = model.checkerboard(stripes, pw, ene, mag)
+    assert np.all(ene < 0)
+
+    # test mcsweeps method returns one row of averages per replica
+    avg = model.mcsweeps(spinconf, pw)
+    assert avg.shape == (3, 6)
+    assert avg[0, 0] < avg[2, 0] # lower temperature, lower energy
+    with pytest.raises(ValueError):
+        model.mcsweeps(spinconf, pw, update='wolff')
@@ -0,0 +1,53 @@
+###############################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Function: Test for Bit-packed 2D Ising Model
+###############################################
+
+import sys
+base_path = ''
+sys.path.append(base_path + 'monte-carlo/monte_carlo/ising_model_2d/src/')
+import numpy as np
+import pytest
+import bitpacked_ising as bising
+import Ising_model_2d as ising
+
+def test_bitpacked_ising():
+    # test default values
+    model = bising.BitPackedIsing(64, 10, 20)
+    assert model.nword == 1
+    with pytest.raises(ValueError):
+        bising.BitPackedIsing(48, 10, 20)
+
+    # test initialize, pack and unpack methods
+    words = model.initialize()
+    assert words.shape == (64, 1)
+    assert words.dtype == np.uint64
+    spinconf = model.unpack(words)
+    assert np.array_equal(model.pack(spinconf), words)
+
+    # test energy and magnetization against the unpacked lattice
+    ref = ising.Ising(64, 10, 20)
+    assert model.energy(words) == ref.energy(spinconf)
+    assert model.magnetization(words) == ref.magnetization(spinconf)
+
+    # test metropolis method
+    pw = model.precom_expo(2.27)
+    ene, mag = model.metropolis(words, pw)
+    assert ene == ref.energy(model.unpack(words))
+    assert mag == ref.magnetization(model.unpack(words))
+
+    # test width-1 stripes (every move has zero energy change) relax
+    stripes = np.ones((64, 64), dtype=np.int8)
+    stripes[:, 1::2] = -1
+    packed = model.pack(stripes)
+    assert model.energy(packed) == 0
+    for _ in range(20):
+        ene, mag = model.metropolis(packed, pw)
+    assert ene < -model.N
+
+    # test mcsweeps method
+    avg = model.mcsweeps(words, pw)
+    assert len(avg) == 6
+    with pytest.raises(ValueError):
+        model.mcsweeps(words, pw, update='wolff')
@@ -5,6 +5,9 @@
 #####################################
 
 import sys
+import random
+import numpy as np
+import pytest
 base_path = ''
 sys.path.append(base_path + 'monte-carlo/monte_carlo/ising_model_2d/src/')
 import Ising_model_2d as ising
@@ -45,4 +48,168 @@ def test_ising():
 
     # test mcsweeps method
     avg = model.mcsweeps(spinconf, pw)
-    assert len(avg) == 6
\ No newline at end of file
+    assert len(avg) == 6
+
+def test_checkerboard():
+    model = ising.Ising(8, 10, 100)
+    pw = model.precom_expo(2.0)
+
+    # test initialize method with a numpy dtype
+    spinconf = model.initialize(dtype=np.int8)
+    assert spinconf.shape == (model.L, model.L)
+    assert spinconf.dtype == np.int8
+
+    # test energy and magnetization agree for list and array lattices
+    assert model.energy(spinconf.tolist()) == model.energy(spinconf)
+    assert model.magnetization(spinconf.tolist()) == model.magnetization(spinconf)
+
+    # test checkerboard method keeps running totals exact
+    ene, mag = model.checkerboard(spinconf, pw)
+    assert ene == model.energy(spinconf)
+    assert mag == model.magnetization(spinconf)
+
+    # test mcsweeps method with the checkerboard kernel
+    avg = model.mcsweeps(spinconf, pw, update='checkerboard')
+    assert len(avg) == 6
+    assert -2 <= avg[0]/(model.nsteps*model.N) < 0
+
+    # test width-1 stripes (every move has zero energy change) relax
+    stripes = np.ones((16, 16), dtype=np.int8)
+    stripes[:, 1::2] = -1
+    model = ising.Ising(16, 10, 100)
+    ene, mag = model.energy(stripes), model.magnetization(stripes)
+    assert ene == 0
+    for _ in range(20):
+        ene, mag = model.checkerboard(stripes, pw, ene, mag)
+    assert ene < -model.N
+
+    # test odd lattice sizes are rejected
+    with pytest.raises(ValueError):
+        ising.Ising(5, 10, 100).checkerboard(spinconf, pw)
+
+
+def test_cluster_updates():
+    model = ising.Ising(6, 10, 50)
+    pw = model.precom_expo(2.27)
+    spinconf = model.initialize(dtype=np.int8)
+
+    # test neighbor_table method
+    nbr = model.neighbor_table()
+    assert nbr.shape == (4, model.N)
+
+    # test cluster_labels method on two separate bonds
+    label = model.cluster_labels(np.array([0, 5]), np.array([1, 4]))
+    assert label[1] == 0 and label[5] == 4 and label[2] == 2
+
+    # test wolff and swendsen_wang methods keep running totals exact
+    for update in (model.wolff, model.swendsen_wang):
+        ene, mag = update(spinconf, pw)
+        assert ene == model.energy(spinconf)
+        assert mag == model.magnetization(spinconf)
+
+    # test mcsweeps method with the cluster kernels
+    for update in ('wolff', 'swendsen_wang'):
+        avg = model.mcsweeps(spinconf, pw, update=update)
+        assert len(avg) == 6
+
+    # test unknown kernels are rejected
+    with pytest.raises(ValueError):
+        model.mcsweeps(spinconf, pw, update='heatbath')
+
+    # test a wolff sweep of mcsweeps flips ncluster clusters
+    one = ising.Ising(6, 0, 1)
+    np.random.seed(3)
+    first = one.initialize(dtype=np.int8)
+    second = first.copy()
+    one.mcsweeps(first, pw, update='wolff', ncluster=5)
+    np.random.seed(3)
+    one.initialize(dtype=np.int8)
+    for _ in range(5):
+        one.wolff(second, pw)
+    assert np.array_equal(first, second)
+    sim = ising.IsingSimulation(6, 5, 20, 2.27, update='wolff', ncluster=4, check=1)
+    assert len(sim.run()) == 6
+    with pytest.raises(ValueError):
+        model.mcsweeps(spinconf, pw, update='metropolis', ncluster=5)
+
+
+def test_simulation():
+    # test default values
+    sim = ising.IsingSimulation(6, 5, 20, 2.27, update='checkerboard', check=1)
+    assert sim.T == 2.27
+    assert len(sim.pw) == 17
+    assert sim.ene == sim.energy(sim.spinconf)
+    assert sim.mag == sim.magnetization(sim.spinconf)
+
+    # test run method keeps the running totals valid across calls
+    for update in ('metropolis', 'checkerboard', 'wolff', 'swendsen_wang'):
+        sim = ising.IsingSimulation(6, 5, 20, 2.27, update=update, check=1)
+        avg = sim.run()
+        avg = sim.run()
+        assert len(avg) == 6
+        assert sim.nsweeps == 2*(sim.nwarmup + sim.nsteps)
+
+    # test verify method detects drifted totals
+    sim.mag += 2
+    with pytest.raises(RuntimeError):
+        sim.verify()
+
+
+def test_checkpoint(tmp_path):
+    model = ising.Ising(6, 20, 50)
+    pw = model.precom_expo(2.3)
+
+    # reference run without interruption
+    np.random.seed(7)
+    random.seed(7)
+    spinconf = model.initialize(dtype=np.int8)
+    avg = model.mcsweeps(spinconf, pw, update='checkerboard')
+
+    # run killed after 37 sweeps with a checkpoint every 7 sweeps
+    np.random.seed(7)
+    random.seed(7)
+    spinconf = model.initialize(dtype=np.int8)
+    killed = ising.Ising(6, 20, 50)
+    checkerboard = killed.checkerboard
+    calls = []
+    def kernel(*args):
+        calls.append(1)
+        if len(calls) > 37:
+            raise KeyboardInterrupt
+        return checkerboard(*args)
+    killed.kernel = lambda update, ncluster=1: kernel
+    with pytest.raises(KeyboardInterrupt):
+        killed.mcsweeps(spinconf, pw, update='checkerboard',
+                        checkpoint=str(tmp_path), every=7)
+    assert (tmp_path / 'state.pkl').exists()
+
+    # test resume method continues bit-for-bit
+    np.random.seed(0)
+    assert np.array_equal(model.resume(str(tmp_path)), avg)
+
+    # test resume method rejects a different model
+    with pytest.raises(ValueError):
+        ising.Ising(8, 20, 50).resume(str(tmp_path))
+
+
+def test_correlation():
+    model = ising.Ising(8, 10, 40)
+    spinconf = model.initialize(dtype=np.int8)
+
+    # test structure_factor and correlation methods against direct sums
+    sk = model.structure_factor(spinconf)
+    assert sk.shape == (model.L, model.L)
+    assert np.isclose(sk[0, 0], model.magnetization(spinconf)**2/model.N)
+    gr = model.correlation(sk)
+    assert np.isclose(gr[0, 0], 1)
+    assert np.isclose(gr[0, 1], np.mean(spinconf*np.roll(spinconf, -1, axis=1)))
+
+    # test mcsweeps method accumulates the structure factor
+    sk = np.zeros((model.L, model.L))
+    avg = model.mcsweeps(spinconf, model.precom_expo(2.27),
+                         update='checkerboard', sk=sk)
+    assert np.isclose(sk[0, 0], avg[3]/model.N)
+
+    # test correlation_length method
+    xi = model.correlation_length(sk/model.nsteps)
+    assert xi >= 0
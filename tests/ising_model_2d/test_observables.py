@@ -0,0 +1,63 @@
+##############################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Function: Test for Ising Streaming Observables
+##############################################
+
+import sys
+base_path = ''
+sys.path.append(base_path + 'monte-carlo/monte_carlo/ising_model_2d/src/')
+import numpy as np
+import observables as obs
+import Ising_model_2d as ising
+
+def test_binning_analysis():
+    # test push method keeps one pending bin per level
+    binning = obs.BinningAnalysis(2, minbins=4)
+    for x in range(64):
+        binning.push([x, 1.0])
+    assert binning.count == 64
+    assert len(binning.n) == 7
+    assert binning.n[0] == 64 and binning.n[3] == 8
+
+    # test mean, error and tau methods
+    assert np.allclose(binning.mean(), [31.5, 1.0])
+    assert binning.level() == 4
+    assert binning.error()[1] == 0
+    assert binning.tau()[0] > 1 # a linear trend is strongly correlated
+
+def test_ising_observables():
+    np.random.seed(1)
+    model = ising.Ising(8, 10, 4000)
+    pw = model.precom_expo(3.5)
+    spinconf = model.initialize(dtype=np.int8)
+
+    # test measure method with a fixed number of sweeps
+    meas = obs.IsingObservables(model, 3.5, minbins=8)
+    meas.measure(spinconf, pw, update='checkerboard')
+    assert meas.count == model.nsteps
+    ene, err = meas.energy()
+    assert -2 <= ene < 0 and err > 0
+    for value, err in (meas.specific_heat(), meas.susceptibility()):
+        assert value > 0 and err >= 0
+
+    # test measure method stops early at a loose target error
+    meas = obs.IsingObservables(model, 3.5, minbins=8)
+    meas.measure(spinconf, pw, update='checkerboard', rel_err=10, check=10)
+    assert meas.count < model.nsteps
+    assert meas.converged(10)
+
+def test_correlated_series():
+    # an AR(1) series with autocorrelation time ~ 50 must not stop early
+    np.random.seed(2)
+    meas = obs.IsingObservables(ising.Ising(4, 0, 0), 2.27, minbins=8)
+    a = np.exp(-1/50)
+    ene = mag = 0.0
+    for step in range(1, 20001):
+        ene = a*ene + np.random.randn()
+        mag = a*mag + np.random.randn()
+        meas.push(ene - 20, mag)
+        if step == 500:
+            assert not meas.converged(10) # bins of a few sweeps only
+    assert meas.tau(meas.level()).max() > 20
+    assert meas.converged(10)
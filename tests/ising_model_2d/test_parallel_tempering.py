@@ -0,0 +1,49 @@
+#############################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Function: Test for Ising Parallel Tempering
+#############################################
+
+import random
+import sys
+base_path = ''
+sys.path.append(base_path + 'monte-carlo/monte_carlo/ising_model_2d/src/')
+import numpy as np
+import parallel_tempering as pt
+
+def test_parallel_tempering():
+    # test default values
+    T = [1.5, 2.3, 3.5]
+    model = pt.ParallelTempering(4, 10, 50, T, nswap=5, nprocs=1)
+    assert model.L == 4
+    assert len(model.T) == 3
+
+    # test swap method exchanges labels only for accepted pairs
+    temp = np.arange(3)
+    accepted = model.swap(np.array([-32., -8., 0.]), temp, 0)
+    assert len(accepted) == 2
+    assert sorted(temp) == [0, 1, 2]
+
+    # test run method in serial and in a process pool
+    for nprocs in (1, 2):
+        model.nprocs = nprocs
+        avg, acc = model.run(update='checkerboard')
+        assert avg.shape == (3, 6)
+        assert np.all(avg[:, 0] < 0)
+        assert len(acc) == 2
+        assert np.all((acc >= 0) & (acc <= 1))
+
+def test_caller_random_state():
+    # test serial tasks leave the caller's random streams to the caller,
+    # so that serial and pooled runs from the same seed agree
+    model = pt.ParallelTempering(4, 5, 20, [1.5, 2.3, 3.5], nswap=5, nprocs=1)
+    random.seed(5)
+    state = random.getstate()
+    np.random.seed(5)
+    serial = model.run(update='checkerboard')
+    assert random.getstate() == state
+    model.nprocs = 2
+    np.random.seed(5)
+    pooled = model.run(update='checkerboard')
+    assert np.array_equal(serial[0], pooled[0])
+    assert np.array_equal(serial[1], pooled[1], equal_nan=True)
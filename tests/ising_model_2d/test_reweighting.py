@@ -0,0 +1,45 @@
+###############################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Function: Test for Ising Histogram Reweighting
+###############################################
+
+import sys
+base_path = ''
+sys.path.append(base_path + 'monte-carlo/monte_carlo/ising_model_2d/src/')
+import numpy as np
+import reweighting as rw
+import Ising_model_2d as ising
+
+def test_reweighting():
+    # test mcsweeps method collects the joint histogram
+    model = ising.Ising(4, 50, 500)
+    T = [2.0, 2.5]
+    hists = []
+    for t in T:
+        hist = {}
+        avg = model.mcsweeps(model.initialize(), model.precom_expo(t), hist=hist)
+        assert sum(hist.values()) == model.nsteps
+        assert np.isclose(sum(e*n for (e, _), n in hist.items()), avg[0])
+        hists.append(hist)
+
+    # test single-histogram reweighting returns the sampled averages
+    single = rw.HistogramReweighting(model.N, T[:1], hists[:1])
+    e, c, m, chi = single.observables(T[0])
+    n = sum(hists[0].values())
+    assert np.isclose(e[0], sum(e*k for (e, _), k in hists[0].items())/(n*model.N))
+    assert np.isclose(single.quality(T[0])[0], 1)
+
+    # test multi-histogram reweighting over a temperature grid
+    multi = rw.HistogramReweighting(model.N, T, hists)
+    assert len(multi.f) == 2 and multi.f[0] == 0
+    grid = np.linspace(2.0, 2.5, 6)
+    e, c, m, chi = multi.observables(grid)
+    assert e.shape == (6,)
+    assert np.all(np.diff(e) > 0) # energy grows with temperature
+    assert np.all(c > 0) and np.all(chi > 0)
+    quality = multi.quality(grid)
+    assert np.all((quality > 0) & (quality <= 1))
+
+    # test logsumexp function
+    assert np.isclose(rw.logsumexp(np.array([1000., 1000.])), 1000 + np.log(2))
@@ -23,6 +23,27 @@ def test_persistent():
     assert len(x_avg) == model.nsteps+1
     assert len(sigma2) == model.nsteps+1
 
+    # test streaming moments mode
+    x_arr, visited_sites, x_avg, sigma2 = model.monte_carlo(max_bytes=400,
+                                                            stream=True)
+    assert x_arr is None
+    assert sum(visited_sites.values()) == model.ntrials
+    assert len(sigma2) == model.nsteps+1
+
+    # test loop trajectories
+    x_arr, _, _, _ = model.monte_carlo(method='loop')
+    assert x_arr.shape == (model.ntrials, model.nsteps+1)
+
+    # test exact moments method
+    x_avg, sigma2 = walk.PersistentRandomWalk1D(10, 100, 0.5).exact_moments()
+    assert max(abs(x_avg)) < 1e-12
+    assert max(abs(sigma2 - range(11))) < 1e-12
+    model2 = walk.PersistentRandomWalk1D(20, 20000, 0.8)
+    _, _, x_avg, sigma2 = model2.monte_carlo()
+    x_exact, sigma2_exact = model2.exact_moments()
+    assert abs(x_avg[-1] - x_exact[-1]) < 0.5
+    assert abs(sigma2[-1]/sigma2_exact[-1] - 1) < 0.1
+
     # test sites visited method
     count = model.sites_visited()
     assert len(count) == model.nsteps+1
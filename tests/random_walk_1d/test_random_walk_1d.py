@@ -0,0 +1,123 @@
+#############################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Function: Test for Random Walk 1D
+#############################################
+
+import sys
+import importlib.util
+base_path = ''
+sys.path.append(base_path + 'monte-carlo/monte_carlo/random_walk_1d/src/')
+import numpy as np
+
+# load by path: the name random_walk_1d is taken by this test package
+spec = importlib.util.spec_from_file_location(
+    'walk', base_path + 'monte-carlo/monte_carlo/random_walk_1d/src/random_walk_1d.py')
+walk = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(walk)
+
+def test_random_walk_1d():
+    # test default values
+    model = walk.RandomWalk1D(50, 4000, 0.75)
+    assert model.nsteps == 50
+    assert model.ntrials == 4000
+    assert model.p == 0.75
+
+    # test vectorized monte carlo method with small chunks
+    x_arr, visited_sites, x_avg, sigma2 = model.monte_carlo(max_bytes=10**4)
+    assert x_arr.shape == (model.ntrials, model.nsteps+1)
+    assert np.all(x_arr[:, 0] == 0)
+    assert np.all(np.abs(np.diff(x_arr, axis=1)) == 1)
+    assert sum(visited_sites.values()) == model.ntrials
+    assert abs(x_avg[-1] - 25) < 0.5
+    assert abs(sigma2[-1] - 37.5) < 4
+
+    # test loop monte carlo method
+    x_arr, visited_sites, x_avg, sigma2 = model.monte_carlo(method='loop')
+    assert x_arr.shape == (model.ntrials, model.nsteps+1)
+    assert len(x_avg) == model.nsteps+1
+
+    # test streaming moments mode
+    x_arr, visited_sites, x_avg, sigma2 = model.monte_carlo(max_bytes=10**4,
+                                                            stream=True)
+    assert x_arr is None
+    assert sum(visited_sites.values()) == model.ntrials
+    assert len(x_avg) == model.nsteps+1
+    assert abs(sigma2[-1] - 37.5) < 4
+
+    # test positional (max_bytes, stream, method) as in the other walks
+    model.ntrials = 200
+    x_arr, visited_sites, _, _ = model.monte_carlo(10**4, True, 'loop')
+    assert x_arr is None
+    assert sum(visited_sites.values()) == model.ntrials
+
+def test_moments():
+    # test exact merge of chunked moments
+    from ensemble import Moments
+    data = np.random.randn(1000, 5)*3 + 1
+    moments = Moments(5, order=4)
+    for chunk in np.array_split(data, 7):
+        moments.push(chunk)
+    assert np.allclose(moments.mean, data.mean(axis=0))
+    for k in (2, 3, 4):
+        expected = ((data - data.mean(axis=0))**k).mean(axis=0)
+        assert np.allclose(moments.central(k), expected)
+
+def test_sites_count():
+    # test running extrema count of distinct sites
+    from ensemble import sites_count
+    pos = np.array([[0, 1, 0, -1, 0, 1, 2]])
+    assert np.all(sites_count(pos) == [[1, 2, 2, 3, 3, 3, 4]])
+
+    # test vectorized average sites visited method
+    model = walk.RandomWalk1D(30, 200, 0.5)
+    mean_count = model.average_sites_visited()
+    assert len(mean_count) == model.nsteps+1
+    assert mean_count[0] == 1 and mean_count[1] == 2
+    assert np.all(np.diff(mean_count) >= 0)
+
+def test_exact_dist():
+    # test exact distribution over all reachable sites
+    model = walk.RandomWalk1D(40, 100, 0.3)
+    x_pos, prob = model.exact_dist()
+    assert len(x_pos) == model.nsteps+1
+    assert abs(prob.sum() - 1) < 1e-12
+    assert abs(x_pos @ prob - model.nsteps*(2*model.p - 1)) < 1e-10
+
+    # test exact distribution at the sites of a histogram
+    x_pos, prob = walk.RandomWalk1D(3000, 100, 0.5).exact_dist({0: 1, 2: 3})
+    assert list(x_pos) == [0, 2]
+    assert 0 < prob[1] < prob[0] < 1
+
+    # test sites not reachable in n steps have probability 0
+    x_pos, prob = model.exact_dist({-42: 1, -40: 1, 1: 1, 40: 1, 42: 1})
+    assert list(x_pos) == [-42, -40, 1, 40, 42]
+    assert prob[0] == prob[2] == prob[4] == 0
+    assert np.allclose(prob[[1, 3]], [0.7**40, 0.3**40], rtol=1e-10, atol=0)
+
+    # test gaussian approximation
+    x_pos, gau_prob = model.gaussian_approx(2)
+    assert len(gau_prob) == model.nsteps+1
+    assert abs(gau_prob.sum() - 1) < 1e-3
+
+def test_exact_enumeration():
+    # test exact enumeration at p = 0.5
+    model = walk.RandomWalk1D(10, 100, 0.5)
+    x_pos, prob, x_avg, x2_avg = model.exact_enumeration()
+    assert len(x_pos) == 2*model.nsteps+1
+    assert abs(prob.sum() - 1) < 1e-12
+    assert abs(x_avg) < 1e-12
+    assert abs(x2_avg - model.nsteps) < 1e-12
+
+    # test convolution and fft enumeration for arbitrary p
+    model = walk.RandomWalk1D(300, 100, 0.7)
+    _, prob1, x_avg, x2_avg = model.exact_enumeration()
+    _, prob2, _, _ = model.exact_enumeration(nfft=10)
+    assert np.allclose(prob1, prob2, atol=1e-12)
+    assert abs(x_avg - 120) < 1e-9
+    assert abs(x2_avg - x_avg**2 - 252) < 1e-6
+
+    # test general step distribution
+    _, _, x_avg, x2_avg = model.exact_enumeration({-1: 0.3, 0: 0.2, 2: 0.5})
+    assert abs(x_avg - 0.7*model.nsteps) < 1e-9
+    assert abs(x2_avg - x_avg**2 - 1.81*model.nsteps) < 1e-6
@@ -7,6 +7,7 @@
 import sys
 base_path = ''
 sys.path.append(base_path + 'monte-carlo/monte_carlo/random_walk_1d/src/')
+import numpy as np
 import randomly_distributed_trap_1d as walk
 
 def test_randomly_distributed_trap():
@@ -40,4 +41,71 @@ def test_randomly_distributed_trap():
     mean_proba = model.average_survival_proba()
     assert len(mean_proba) ==  model.nsteps +1
 
+    # test survival_proba method against exact enumeration
+    np.random.seed(0)
+    _, site_label = model.lattice()
+    np.random.seed(0)
+    proba_trap_config = model.exact_enumeration_proba()
+    proba = model.survival_proba(site_label[None, :])
+    assert np.allclose(proba[0], proba_trap_config)
+
+    # test vectorized and float32 average_survival_proba
+    mean_proba = model.average_survival_proba(dtype=np.float32, max_bytes=1000)
+    assert len(mean_proba) == model.nsteps + 1
+    assert mean_proba[0] == 1
+    mean_proba = model.average_survival_proba(method='loop')
+    assert len(mean_proba) == model.nsteps + 1
+
+    # test summed survival_proba matches the per-configuration curves
+    site_label = model.configurations(7)
+    assert np.allclose(model.survival_proba(site_label, total=True),
+                       model.survival_proba(site_label).sum(axis=0))
+
+def test_exact_nsteps_trap():
+    # test exact mean survival time of a fixed configuration
+    model = walk.RandomlyDistributedTrap(100, 2000, 0.5, 0.4, 10)
+    site_label = np.ones(model.L)
+    site_label[[2, 6]] = 0
+    assert np.allclose(model.exact_nsteps_trap(site_label), 4.5)
+    assert np.all(model.exact_nsteps_trap(np.ones((2, model.L))) == model.nsteps)
+
+    # test biased walks: a segment of G bonds gives sum_k T(k)
+    model.p = 0.7
+    site_label = np.ones(model.L)
+    site_label[0] = 0
+    k = np.arange(1, model.L)
+    u = ((3/7)**k - (3/7)**model.L)/(1 - (3/7)**model.L)
+    expected = ((model.L*(1 - u) - k)/0.4).sum()/model.L
+    assert np.allclose(model.exact_nsteps_trap(site_label), expected)
+
+    # test exact average_nsteps_trap method
+    model = walk.RandomlyDistributedTrap(100, 4000, 0.7, 0.6, 10)
+    assert abs(model.average_nsteps_trap(method='exact') -
+               model.average_nsteps_trap()) < 0.15
+
+def test_configuration_pool():
+    # test batched trap configurations
+    np.random.seed(1)   # the pool estimate scatters by about 0.1
+    model = walk.RandomlyDistributedTrap(100, 4000, 0.5, 0.6, 10)
+    site_label = model.configurations(1000)
+    assert site_label.shape == (1000, model.L)
+    assert abs(1 - site_label.mean() - model.rho) < 0.02
+
+    # test walkers on a pool of configurations
+    count = model.configuration_pool(50, 40)
+    assert count.shape == (50, 40)
+    assert np.all((count >= 0) & (count <= model.nsteps))
+    assert abs(model.average_nsteps_trap(method='pool', nconfigs=200) -
+               model.average_nsteps_trap(method='exact')) < 0.15
 
+def test_survival_memory():
+    # test that the survival probability chunks stay below max_bytes
+    import tracemalloc
+    model = walk.RandomlyDistributedTrap(300, 2000, 0.5, 0.3, 20)
+    model.average_survival_proba(max_bytes=2**20)   # warm up
+    tracemalloc.start()
+    mean_proba = model.average_survival_proba(max_bytes=2**20)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 2**20
+    assert mean_proba[0] == 1
@@ -0,0 +1,95 @@
+#############################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Function: Test for Restricted Random Walk 1D
+#############################################
+
+import sys
+base_path = ''
+sys.path.append(base_path + 'monte-carlo/monte_carlo/random_walk_1d/src/')
+import numpy as np
+import restricted_random_walk_1d as walk
+
+def test_restricted():
+    # test default values
+    model = walk.RestrictedRandomWalk1D(1000, 20000, 0.5, 10)
+    assert model.nsteps == 1000
+    assert model.ntrials == 20000
+    assert model.p == 0.5
+    assert model.L == 10
+
+    # test first passage method
+    hist0, histL, survivors = model.first_passage(compact=5)
+    assert len(hist0) == len(histL) == model.nsteps+1
+    assert hist0.sum() + histL.sum() + survivors == model.ntrials
+    assert hist0[:5].sum() == 0 and hist0[5] > 0
+
+    # test average_nsteps_trap and prob_trap methods (x(L - x) = 25 and 1/2)
+    assert abs(model.average_nsteps_trap() - 25) < 1
+    assert abs(model.prob_trap() - 0.5) < 0.02
+
+    # test loop methods
+    model.ntrials = 100
+    assert model.average_nsteps_trap(method='loop') != 0
+    assert 0 <= model.prob_trap(method='loop') <= 1
+
+def test_exact_trap():
+    # test exact first passage distribution against gambler's ruin
+    model = walk.RestrictedRandomWalk1D(4000, 1, 0.45, 9)
+    hist0, histL, survival = model.exact_first_passage()
+    assert abs(hist0.sum() + histL.sum() + survival - 1) < 1e-12
+    u, T = model.gamblers_ruin()
+    assert abs(model.prob_trap(method='exact') - u) < 1e-10
+    assert abs(model.average_nsteps_trap(method='exact') - T) < 1e-8
+    assert model.prob_trap(method='ruin') == u
+    assert model.average_nsteps_trap(method='ruin') == T
+
+    # test gambler's ruin at p = 1/2 and for large lattices
+    assert walk.RestrictedRandomWalk1D(10, 1, 0.5, 10).gamblers_ruin() == (0.5, 25.0)
+    u, T = walk.RestrictedRandomWalk1D(10, 1, 0.7, 10**6).gamblers_ruin()
+    assert u == 0 and abs(T - 0.5*10**6/0.4) < 1e-6
+
+def test_reflecting():
+    # test vectorized reflecting boundaries against the exact distribution
+    model = walk.RestrictedRandomWalk1D(30, 20000, 0.6, 4)
+    x_arr, visited_sites, x_avg, sigma2 = model.reflecting_boundaries()
+    assert x_arr.shape == (model.ntrials, model.nsteps+1)
+    assert np.all(np.abs(x_arr) <= model.L)
+    x_pos, prob, x_exact, sigma2_exact = model.reflecting_exact()
+    assert len(x_pos) == 2*model.L+1
+    assert abs(prob.sum() - 1) < 1e-12
+    assert np.all(np.abs(x_avg - x_exact) < 0.1)
+    assert np.all(np.abs(sigma2 - sigma2_exact) < 0.3)
+
+    # test final position histogram
+    hist = model.reflecting_histogram()
+    assert hist.sum() == model.ntrials
+    assert np.all(np.abs(hist/model.ntrials - prob) < 0.02)
+
+    # test stationary distribution as the average over two periods
+    x_pos, pi = model.reflecting_stationary()
+    model.nsteps = 500
+    prob1 = model.reflecting_exact()[1]
+    model.nsteps = 501
+    prob2 = model.reflecting_exact()[1]
+    assert np.allclose((prob1 + prob2)/2, pi)
+
+def test_large_lattice():
+    # test site indices and counts do not overflow the positions for L >= 2**14
+    model = walk.RestrictedRandomWalk1D(20000, 10, 1.0, 20000)
+    hist = model.reflecting_histogram()
+    assert hist[-1] == model.ntrials
+    mean_count = model.average_sites_visited()
+    assert mean_count[-1] == model.nsteps + 1
+
+def test_stream_memory():
+    # test that streaming with its temporaries stays below max_bytes
+    import tracemalloc
+    model = walk.RestrictedRandomWalk1D(1000, 2000, 0.5, 10)
+    model.reflecting_boundaries(max_bytes=2**20, stream=True)   # warm up
+    tracemalloc.start()
+    _, _, _, sigma2 = model.reflecting_boundaries(max_bytes=2**20, stream=True)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 2**20
+    assert np.all(sigma2 >= 0)
@@ -0,0 +1,39 @@
+#############################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Function: Test for True Self-Avoiding Walk 1D
+#############################################
+
+import sys
+base_path = ''
+sys.path.append(base_path + 'monte-carlo/monte_carlo/random_walk_1d/src/')
+import numpy as np
+import true_self_avoiding_walk_1d as walk
+
+def test_true_self_avoiding_walk():
+    # test default values
+    model = walk.TrueSelfAvoidingWalk1D(60, 4000, 1.0)
+    assert model.nsteps == 60
+    assert model.ntrials == 4000
+    assert model.g == 1.0
+
+    # test vectorized monte carlo method
+    x_arr, visited_sites, x_avg, sigma2 = model.monte_carlo(max_bytes=10**5)
+    assert x_arr.shape == (model.ntrials, model.nsteps+1)
+    assert np.all(np.abs(np.diff(x_arr, axis=1)) == 1)
+    assert sum(visited_sites.values()) == model.ntrials
+
+    # test against the loop method
+    model.ntrials = 1000
+    _, _, _, sigma2_loop = model.monte_carlo(method='loop')
+    assert abs(sigma2[-1]/sigma2_loop[-1] - 1) < 0.15
+
+    # test g = 0 reduces to the simple random walk
+    model = walk.TrueSelfAvoidingWalk1D(40, 4000, 0.0)
+    _, _, _, sigma2 = model.monte_carlo(stream=True)
+    assert abs(sigma2[-1] - 40) < 4
+
+    # test sites visited methods
+    assert len(model.sites_visited()) == model.nsteps+1
+    mean_count = model.average_sites_visited()
+    assert len(mean_count) == model.nsteps+1
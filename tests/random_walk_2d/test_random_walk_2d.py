@@ -0,0 +1,57 @@
+#############################################
+# Author: S. A. Owerre
+# Date modified: 17/10/2026
+# Function: Test for Random Walk 2D
+#############################################
+
+import importlib.util
+import numpy as np
+base_path = ''
+
+# load by path: the name random_walk_2d is taken by this test package
+spec = importlib.util.spec_from_file_location(
+    'walk', base_path + 'monte-carlo/monte_carlo/random_walk_2d/src/random_walk_2d.py')
+walk = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(walk)
+
+def test_random_walk_2d():
+    # test default values
+    model = walk.RandomWalk2D(20, 500)
+    assert model.nsteps == 20
+    assert model.nwalkers == 500
+
+    # test monte carlo method
+    x_arr, y_arr, sigma2x, sigma2y, r2 = model.monte_carlo(max_bytes=4000)
+    assert x_arr.shape == (model.nwalkers, model.nsteps+1)
+    assert y_arr.shape == (model.nwalkers, model.nsteps+1)
+    assert np.allclose(sigma2x, x_arr.var(axis=0))
+    assert np.allclose(r2, sigma2x + sigma2y)
+    assert abs(r2[-1] - model.nsteps) < 3
+
+    # test streaming moments mode
+    x_arr, y_arr, sigma2x, sigma2y, r2 = model.monte_carlo(stream=True)
+    assert x_arr is None and y_arr is None
+    assert len(r2) == model.nsteps+1
+
+    # test vectorized and loop trajectories
+    for method in ('vectorized', 'loop'):
+        x_pos, y_pos = next(model.trajectories(method=method))
+        assert x_pos.shape == y_pos.shape == (model.nwalkers, model.nsteps+1)
+        assert np.all(np.abs(np.diff(x_pos, axis=1)) +
+                      np.abs(np.diff(y_pos, axis=1)) == 1)
+
+def test_sites_count():
+    # test first occurrence count of encoded sites
+    x_pos = np.array([[0, 1, 1, 0, 0, 1]])
+    y_pos = np.array([[0, 0, 1, 1, 0, 0]])
+    assert np.all(walk.sites_count(x_pos, y_pos) == [[1, 2, 3, 4, 4, 4]])
+
+    # test vectorized average sites visited method
+    model = walk.RandomWalk2D(30, 2000)
+    mean_count = model.average_sites_visited(max_bytes=10**5)
+    assert len(mean_count) == model.nsteps+1
+    assert mean_count[0] == 1 and mean_count[1] == 2
+    assert abs(mean_count[2] - 2.75) < 0.05
+    assert np.all(np.diff(mean_count) >= 0)
+    model.nwalkers = 20
+    assert len(model.average_sites_visited(method='loop')) == model.nsteps+1